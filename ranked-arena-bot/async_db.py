@@ -0,0 +1,90 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CallStats:
+    """Per-operation call counts and latency, with a log line for slow calls."""
+
+    def __init__(self, slow_seconds=0.5):
+        self.slow_seconds = slow_seconds
+        self.calls = {}
+
+    def record(self, name, seconds):
+        count, total, worst = self.calls.get(name, (0, 0.0, 0.0))
+        self.calls[name] = (count + 1, total + seconds, max(worst, seconds))
+        if seconds >= self.slow_seconds:
+            print(f"[WARN] Slow database call {name}: {seconds * 1000:.0f} ms")
+
+    def summary(self):
+        return {
+            name: {'calls': count, 'avg_ms': round(total / count * 1000, 2), 'max_ms': round(worst * 1000, 2)}
+            for name, (count, total, worst) in sorted(self.calls.items())
+        }
+
+
+class AsyncCollection:
+    """
+    Awaitable wrapper around a pymongo collection. Every call runs on the
+    database's bounded executor, so the event loop never waits on Mongo.
+    Cursor methods return lists.
+    """
+
+    def __init__(self, database, collection):
+        self._database = database
+        self._collection = collection
+
+    def _call(self, operation, *args, **kwargs):
+        name = f"{self._collection.name}.{operation.__name__}"
+        return self._database.timed(name, operation, *args, **kwargs)
+
+    async def find(self, filter=None, projection=None, sort=None, limit=0, skip=0):
+        def fetch():
+            cursor = self._collection.find(filter or {}, projection, skip=skip, limit=limit)
+            if sort:
+                cursor = cursor.sort(sort)
+            return list(cursor)
+        fetch.__name__ = "find"
+        return await self._call(fetch)
+
+    async def aggregate(self, pipeline, **kwargs):
+        def run():
+            return list(self._collection.aggregate(pipeline, **kwargs))
+        run.__name__ = "aggregate"
+        return await self._call(run)
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            return await self._call(method, *args, **kwargs)
+        return call
+
+
+class AsyncDatabase:
+    def __init__(self, database, max_workers=8, slow_seconds=0.5):
+        self._database = database
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mongo")
+        self._collections = {}
+        self.stats = CallStats(slow_seconds)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name not in self._collections:
+            self._collections[name] = AsyncCollection(self, self._database[name])
+        return self._collections[name]
+
+    async def timed(self, name, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            self.stats.record(name, time.perf_counter() - started)
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking helper that talks to Mongo (e.g. process_match_result) off the loop."""
+        return await self.timed(getattr(fn, '__name__', 'call'), fn, *args, **kwargs)
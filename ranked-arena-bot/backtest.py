@@ -0,0 +1,119 @@
+import argparse
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from mmr_manager import MMR_RULES, TRUESKILL_PARAMS
+from rating_replay import load_games, replay
+
+# Scores candidate rating configs against the stored game history, e.g.
+#   python backtest.py --beta 150,200,250 --tau 0.05,1 --decay-rate 0.01,0.02
+# Every candidate is replayed with the same seed, so runs are reproducible.
+
+PARAM_FLAGS = {"mu": "mu", "sigma": "sigma", "beta": "beta", "tau": "tau"}
+RULE_FLAGS = {
+    "decay_rate": "decay_rate", "decay_floor": "decay_floor", "min_sigma": "min_sigma",
+    "sigma_step": "sigma_step", "min_delta": "min_delta", "max_delta": "max_delta"
+}
+
+_games = None
+
+
+def _init_worker(games):
+    global _games
+    _games = games
+
+
+def build_candidates(args):
+    """Cartesian product of every swept value, the current config first."""
+    axes = []
+    for flag in list(PARAM_FLAGS) + list(RULE_FLAGS):
+        values = getattr(args, flag)
+        axes.append([(flag, float(v)) for v in values.split(",")] if values else [None])
+
+    candidates = [(dict(TRUESKILL_PARAMS), dict(MMR_RULES))]
+    for combo in itertools.product(*axes):
+        params, rules = dict(TRUESKILL_PARAMS), dict(MMR_RULES)
+        for setting in combo:
+            if setting is None:
+                continue
+            flag, value = setting
+            if flag in PARAM_FLAGS:
+                params[PARAM_FLAGS[flag]] = value
+            else:
+                rules[RULE_FLAGS[flag]] = value
+        rules["start_sigma"] = params["sigma"]
+        if (params, rules) not in candidates:
+            candidates.append((params, rules))
+    return candidates
+
+
+def score(win_prob, a_won, warmup=0):
+    """Log-loss, Brier score and accuracy of team A's pre-match win probability."""
+    p = np.clip(win_prob[warmup:], 1e-9, 1 - 1e-9)
+    y = a_won[warmup:].astype(float)
+    if not len(y):
+        return float("nan"), float("nan"), float("nan")
+    log_loss = float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p)))
+    brier = float(np.mean((p - y) ** 2))
+    accuracy = float(np.mean((p >= 0.5) == (y == 1)))
+    return log_loss, brier, accuracy
+
+
+def evaluate(job):
+    index, params, rules, seed, warmup, settled_after = job
+    state = replay(_games, params=params, rules=rules, seed=seed, settled_after=settled_after)
+    log_loss, brier, accuracy = score(state.win_prob, _games.a_won, warmup)
+    stability = state.settled_delta_total / state.settled_delta_count if state.settled_delta_count else float("nan")
+    return {
+        'index': index,
+        'params': params,
+        'rules': rules,
+        'log_loss': log_loss,
+        'brier': brier,
+        'accuracy': accuracy,
+        'settled_abs_delta': stability
+    }
+
+
+def describe(candidate):
+    params, rules = candidate['params'], candidate['rules']
+    changed = [f"{k}={v:g}" for k, v in params.items() if v != TRUESKILL_PARAMS.get(k)]
+    changed += [f"{k}={v:g}" for k, v in rules.items() if v != MMR_RULES.get(k)]
+    return ", ".join(changed) or "current config"
+
+
+def print_report(results, top):
+    ranked = sorted(results, key=lambda r: (r['log_loss'], r['brier'], r['index']))
+    print(f"{'#':>3} {'log-loss':>9} {'brier':>7} {'acc':>6} {'|Δ| settled':>12}  config")
+    for rank, r in enumerate(ranked[:top], start=1):
+        print(f"{rank:>3} {r['log_loss']:>9.4f} {r['brier']:>7.4f} {r['accuracy']:>6.3f} "
+              f"{r['settled_abs_delta']:>12.2f}  {describe(r)}")
+    current = next(r for r in results if r['index'] == 0)
+    position = ranked.index(current) + 1
+    print(f"Current config ranks {position}/{len(ranked)} (log-loss {current['log_loss']:.4f}).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest rating configs against stored games.")
+    for flag in list(PARAM_FLAGS) + list(RULE_FLAGS):
+        parser.add_argument(f"--{flag.replace('_', '-')}", dest=flag, help="comma separated values to sweep")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warmup", type=int, default=200, help="games replayed before scoring starts")
+    parser.add_argument("--settled-after", type=int, default=20, help="games before a player counts as settled")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    history = load_games()
+    candidates = build_candidates(args)
+    print(f"[INFO] Backtesting {len(candidates)} configs on {len(history)} games "
+          f"({history.skipped} older games without a recorded winner are not included).")
+
+    jobs = [(i, params, rules, args.seed, args.warmup, args.settled_after) for i, (params, rules) in enumerate(candidates)]
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(history,)) as pool:
+        results = list(pool.map(evaluate, jobs, chunksize=max(1, len(jobs) // 32)))
+
+    print_report(results, args.top)
+    print(f"[INFO] Done in {time.perf_counter() - started:.1f}s.")
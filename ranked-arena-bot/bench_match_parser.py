@@ -0,0 +1,48 @@
+import argparse
+import glob
+import os
+import re
+import time
+from match_parser import extract_match_cards
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "players")
+
+
+def inflate_history(html, cards):
+    """
+    Repeat the match cards of a fixture page until the history holds
+    `cards` entries, so parse cost can be measured on realistic page sizes.
+    """
+    found = re.findall(r'(      <div class="rounded border p-2">.*?\n      </div>\n)', html, re.S)
+    if not found:
+        return html
+    repeated = "".join(found[i % len(found)] for i in range(cards))
+    return html.replace("".join(found), repeated, 1)
+
+
+def bench(html, iterations):
+    started = time.perf_counter()
+    parsed = 0
+    for _ in range(iterations):
+        parsed += len(extract_match_cards(html))
+    elapsed = time.perf_counter() - started
+    return elapsed, parsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark match-history parsing on saved fixture pages.")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--cards", type=int, nargs="*", default=[0, 20, 100])
+    args = parser.parse_args()
+
+    print(f"{'fixture':<28}{'cards':>7}{'page KB':>9}{'ms/page':>10}{'us/card':>10}")
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            base_html = f.read()
+        for cards in args.cards:
+            html = inflate_history(base_html, cards) if cards else base_html
+            elapsed, parsed = bench(html, args.iterations)
+            per_page = elapsed / args.iterations * 1000
+            per_card = elapsed / parsed * 1e6 if parsed else float("nan")
+            name = os.path.basename(path)[:-5]
+            print(f"{name:<28}{parsed // args.iterations:>7}{len(html) / 1024:>9.1f}{per_page:>10.3f}{per_card:>10.1f}")
@@ -0,0 +1,53 @@
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timezone, timedelta
+from matchmaking import SETTINGS, best_split, find_lobby, joined_at, player_mmr
+
+
+def make_queue(size, now, rng):
+    return [
+        {
+            'discord_id': i,
+            'ign': f"Bench#{i}",
+            'mmr': int(rng.gauss(1000, 200)),
+            'game_type': "ranked_arena",
+            'queue_joined_at': now - timedelta(seconds=rng.uniform(0, 240))
+        }
+        for i in range(size)
+    ]
+
+
+def oldest_eight(queue):
+    lobby = sorted(queue, key=joined_at)[:8]
+    mmrs = [player_mmr(p) for p in lobby]
+    _, _, diff = best_split(mmrs, 4)
+    return max(mmrs) - min(mmrs), diff
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Decision latency and lobby quality of find_lobby by queue size.")
+    parser.add_argument("--sizes", default="8,16,32,64,128,256,512,1024")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    now = datetime.now(timezone.utc)
+    print(f"{'queue':>6} {'p50 ms':>8} {'p95 ms':>8} {'spread':>8} {'diff':>6} {'oldest-8 spread':>16} {'oldest-8 diff':>14}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        latencies, spreads, diffs, old_spreads, old_diffs = [], [], [], [], []
+        for _ in range(args.repeats):
+            queue = make_queue(size, now, rng)
+            started = time.perf_counter()
+            lobby = find_lobby(queue, now, {**SETTINGS, "base_spread": float("inf")})
+            latencies.append((time.perf_counter() - started) * 1000)
+            spreads.append(lobby.spread)
+            diffs.append(lobby.smallest_diff)
+            old_spread, old_diff = oldest_eight(queue)
+            old_spreads.append(old_spread)
+            old_diffs.append(old_diff)
+        latencies.sort()
+        print(f"{size:>6} {statistics.median(latencies):>8.2f} {latencies[int(len(latencies) * 0.95) - 1]:>8.2f} "
+              f"{statistics.mean(spreads):>8.0f} {statistics.mean(diffs):>6.1f} "
+              f"{statistics.mean(old_spreads):>16.0f} {statistics.mean(old_diffs):>14.1f}")
@@ -0,0 +1,123 @@
+import argparse
+import os
+import random
+import time
+import trueskill
+from pymongo import monitoring
+import database
+import mmr_manager
+
+# Needs a scratch MongoDB: BENCH_MONGO_URI=mongodb://localhost:27017 python bench_mmr_bulk.py
+# Use a replica set (even a single node) to include the transaction cost.
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        if event.command_name not in ("hello", "isMaster", "ping", "endSessions"):
+            self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# The pre-bulk code path, copied from mmr_manager before the per-game rewrite:
+# one find per rating, then a find and an update per player.
+LEGACY_ENV = trueskill.TrueSkill(mu=1000, sigma=300, beta=200, tau=0.05, draw_probability=0.0)
+
+
+def legacy_update_player_mmr(player_id, new_mu, new_sigma, result):
+    db = database.db
+    query_id = int(player_id)
+    data = db.users.find_one({'discord_id': query_id})
+    if not data:
+        return False
+
+    current_mmr = data.get('mmr', 1000)
+    previous_sigma = data.get('confidence', 300)
+    games_played = data.get('games_played', 0)
+
+    manual_sigma = max(100, 300 - games_played * 3)
+    if new_sigma < previous_sigma:
+        new_sigma = max(manual_sigma, new_sigma)
+    else:
+        new_sigma = previous_sigma
+
+    adjusted_delta = (new_mu - current_mmr) * max(0.3, 1 - (games_played * 0.02))
+    if abs(adjusted_delta) < 20:
+        adjusted_delta = 20 + random.uniform(0, 5)
+        adjusted_delta = adjusted_delta if result == 'win' else -adjusted_delta
+    adjusted_delta = max(-70, min(70, adjusted_delta))
+    new_mmr = current_mmr + adjusted_delta
+
+    update_data = {'mmr': new_mmr, 'confidence': new_sigma, 'games_played': games_played + 1}
+    if result == 'win':
+        update_data['wins'] = data.get('wins', 0) + 1
+    elif result == 'lose':
+        update_data['losses'] = data.get('losses', 0) + 1
+    db.users.update_one({'discord_id': query_id}, {'$set': update_data})
+    return {"discord_id": player_id, "delta": adjusted_delta, "new_mmr": new_mmr}
+
+
+def legacy_adjust(team_a, team_b, result):
+    def fetch_user_rating(discord_id):
+        user_doc = database.db.users.find_one({'discord_id': int(discord_id)})
+        if not user_doc:
+            return LEGACY_ENV.create_rating(mu=1000, sigma=300)
+        return LEGACY_ENV.create_rating(mu=user_doc.get('mmr', 1000), sigma=user_doc.get('confidence', 300))
+
+    team_a_ratings = [fetch_user_rating(p['discord_id']) for p in team_a]
+    team_b_ratings = [fetch_user_rating(p['discord_id']) for p in team_b]
+    ranks = [0, 1] if result == "team_a" else [1, 0]
+    team_a_result, team_b_result = LEGACY_ENV.rate([team_a_ratings, team_b_ratings], ranks=ranks)
+    changes = []
+    for player, rating in zip(team_a, team_a_result):
+        changes.append(legacy_update_player_mmr(player['discord_id'], rating.mu, rating.sigma, 'win' if result == "team_a" else 'lose'))
+    for player, rating in zip(team_b, team_b_result):
+        changes.append(legacy_update_player_mmr(player['discord_id'], rating.mu, rating.sigma, 'win' if result == "team_b" else 'lose'))
+    return changes
+
+
+def seed_users(db, players):
+    db.users.delete_many({})
+    db.users.insert_many([
+        {'discord_id': i, 'ign': f"Bench#{i}", 'mmr': random.gauss(1000, 150), 'confidence': 300,
+         'games_played': 0, 'wins': 0, 'losses': 0}
+        for i in range(players)
+    ])
+    db.users.create_index('discord_id', unique=True)
+
+
+def run(label, fn, games, players, counter):
+    counter.count = 0
+    started = time.perf_counter()
+    for _ in range(games):
+        ids = random.sample(range(players), 8)
+        team_a = [{'discord_id': i, 'ign': f"Bench#{i}"} for i in ids[:4]]
+        team_b = [{'discord_id': i, 'ign': f"Bench#{i}"} for i in ids[4:]]
+        fn(team_a, team_b, random.choice(["team_a", "team_b"]))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<8} {counter.count / games:>8.1f} round trips/game {elapsed / games * 1000:>9.2f} ms/game")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-player and bulk MMR updates per processed game.")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--players", type=int, default=200)
+    args = parser.parse_args()
+
+    uri = os.environ.get("BENCH_MONGO_URI", "mongodb://localhost:27017")
+    counter = CommandCounter()
+    database.configure(uri, "ranked-arena-bench", event_listeners=[counter])
+    random.seed(7)
+
+    seed_users(database.db, args.players)
+    run("legacy", legacy_adjust, args.games, args.players, counter)
+    seed_users(database.db, args.players)
+    run("bulk", mmr_manager.adjust_mmr_for_game, args.games, args.players, counter)
+    database.get_client().drop_database("ranked-arena-bench")
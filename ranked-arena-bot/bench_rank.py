@@ -0,0 +1,65 @@
+import argparse
+import random
+import statistics
+import time
+from leaderboard import LeaderboardSnapshot
+
+
+def make_rows(players, rng):
+    return [(i, f"Bench#{i}", rng.gauss(1000, 200)) for i in range(players)]
+
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def scan_rank(rows, discord_id):
+    """The old way: sort everyone by MMR and walk to the player."""
+    ordered = sorted(rows, key=lambda row: row[2], reverse=True)
+    return next(i for i, row in enumerate(ordered) if row[0] == discord_id) + 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank lookup, neighbours and update cost of the leaderboard snapshot.")
+    parser.add_argument("--players", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    rows = make_rows(args.players, rng)
+    started = time.perf_counter()
+    snapshot = LeaderboardSnapshot(rows)
+    print(f"build       {args.players} players in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    ids = [rng.randrange(args.players) for _ in range(args.repeats)]
+    picks = iter(ids * 3)
+    for label, fn in (
+        ("rank_of", lambda: snapshot.rank_of(next(picks))),
+        ("percentile", lambda: snapshot.percentile(next(picks))),
+        ("around ±5", lambda: snapshot.around(next(picks), radius=5)),
+    ):
+        p50, p95 = timed(fn, args.repeats)
+        print(f"{label:<11} p50 {p50:>9.2f} µs  p95 {p95:>9.2f} µs")
+
+    def rate_game():
+        players = rng.sample(range(args.players), 8)
+        return snapshot.with_changes({'discord_id': p, 'mmr': rng.gauss(1000, 200)} for p in players)
+    p50, p95 = timed(rate_game, min(args.repeats, 50))
+    print(f"{'game update':<11} p50 {p50:>9.2f} µs  p95 {p95:>9.2f} µs  (8 players, new snapshot)")
+
+    def rate_tick(games=5):
+        players = rng.sample(range(args.players), 8 * games)
+        return snapshot.with_changes({'discord_id': p, 'mmr': rng.gauss(1000, 200)} for p in players)
+    p50, p95 = timed(rate_tick, min(args.repeats, 50))
+    print(f"{'tick update':<11} p50 {p50:>9.2f} µs  p95 {p95:>9.2f} µs  (5 games flushed together)")
+
+    p50, p95 = timed(lambda: scan_rank(rows, ids[0]), 5)
+    print(f"{'sort+scan':<11} p50 {p50:>9.2f} µs  p95 {p95:>9.2f} µs  (previous approach)")
+
+    assert snapshot.rank_of(ids[0]) == scan_rank(rows, ids[0])
@@ -3,14 +3,23 @@ from discord.ext import commands, tasks
 from discord import app_commands, Thread
 from config import config
 import asyncio
-import threading
-from game_monitor_v2 import monitor_game_v2
+from monitor_scheduler import scheduler as monitor_scheduler
+from async_db import AsyncDatabase
+from game_monitor_v2 import pick_watchers
+from player_ids import ensure_cache_indexes, ensure_resolved, resolve_in_background
+from leaderboard import leaderboard
 from mmr_manager import process_match_result
+from player_index import index as player_index
+from profile_cache import profile_cache
+from matchmaking import draft_turns, form_lobbies, lobby_size_for, settings_for, team_size_for, votes_needed
+from mmr_ledger import ensure_ledger_indexes, get_history, get_rollups, rollup_ledger
+from queue_trigger import trigger as queue_trigger
+from result_processing import FINISHED_RESULTS, claim_next_game, ensure_result_indexes, mark_announced, mark_processed
 from discord import Interaction, ui
 from datetime import datetime, timezone, timedelta
-from itertools import combinations
 import pymongo
-from pymongo import MongoClient
+from database import db
+from schema import check_query_plans, ensure_indexes, normalize_queue_timestamps
 import uuid
 import random
 
@@ -26,30 +35,39 @@ HUNTERS = [
     "Void"
 ]
 
-MONGO_URI = "" # removed for public view purposes
-client = MongoClient(MONGO_URI)
-db = client["Ranked-Arena-Database"]
+adb = AsyncDatabase(db, max_workers=config.get("db_workers", 8), slow_seconds=config.get("db_slow_call_seconds", 0.5))
 
 last_access_ui_message = None
 ALLOWED_CHANNEL_ID = 1374850765830754446
 ALLOWED_ROLES = {"New Tech", "Admin", "Owner", "Helper guy"}
 ANNOUNCE_CHANNEL_ID = 1377002789930143804
+RESULTS_PER_TICK = 10
+QUEUE_TIMEOUT_MINUTES = config.get("queue_timeout_minutes", 60)
 
 intents = discord.Intents.default()
 
 bot = commands.Bot(command_prefix='/', intents=intents)
 
-def get_user_data(discord_id):
-    return db.users.find_one({"discord_id": discord_id})
-
-def get_user_data_by_ign(ign):
-    return db.users.find_one({"ign": ign})
+async def get_user_data(discord_id):
+    user = profile_cache.get(discord_id)
+    if user is None:
+        generation = profile_cache.generation
+        user = await adb.users.find_one({"discord_id": discord_id})
+        profile_cache.put(discord_id, user, generation)
+    return user
+
+async def get_user_data_by_ign(ign):
+    generation = profile_cache.generation
+    user = await adb.users.find_one({"ign": ign})
+    if user:
+        profile_cache.put(user['discord_id'], user, generation)
+    return user
 
-def process_vote_stop(user_id, game_id):
-    game = db.games.find_one({"_id": game_id})
+async def process_vote_stop(user_id, game_id):
+    game = await adb.games.find_one({"_id": game_id})
     if not game:
         return False, f"{game_id} not found."
-    if game.get('result') in ['canceled', 'processed', 'timed_out', 'team_a', 'team_b']:
+    if game.get('result') in FINISHED_RESULTS:
         return False, f"{game_id} is already finished or canceled."
     
     allowed_voters = {str(p.get('discord_id')) for p in game.get('team_a', []) + game.get('team_b', [])}
@@ -61,13 +79,19 @@ def process_vote_stop(user_id, game_id):
         return False, "You've already voted to stop this game."
     
     votes.append(user_id)
-    db.games.update_one({"_id": game_id}, {"$set": {"votes": votes}})
+    await adb.games.update_one({"_id": game_id}, {"$set": {"votes": votes}})
     
-    if len(votes) >= 6:
-        db.games.update_one({"_id": game_id}, {"$set": {"result": "canceled"}})
-        return True, f"{game_id} has been canceled by vote (6/8 or more players agreed). No MMR has been changed."
-
-    return True, f"Your vote was counted. {len(votes)}/8 players have voted to cancel {game_id}. (Need 6 total)"
+    player_count = len(allowed_voters)
+    needed = votes_needed(player_count)
+    if len(votes) >= needed:
+        canceled = await adb.games.update_one({"_id": game_id, "result": "pending"}, {"$set": {"result": "canceled"}})
+        if not canceled.modified_count:
+            return False, f"{game_id} finished before the vote passed."
+        await adb.run(monitor_scheduler.cancel, game_id)
+        player_index.end_game(game_id)
+        return True, f"{game_id} has been canceled by vote ({needed}/{player_count} or more players agreed). No MMR has been changed."
+
+    return True, f"Your vote was counted. {len(votes)}/{player_count} players have voted to cancel {game_id}. (Need {needed} total)"
 
 def check_channel(ctx):
     return ctx.channel.id == ALLOWED_CHANNEL_ID
@@ -77,41 +101,44 @@ def has_permission(interaction: discord.Interaction):
         return False
     return any(role.name in ALLOWED_ROLES for role in interaction.user.roles)
 
-def add_to_queue(discord_id, game_type="ranked_arena"):
-    user = get_user_data(discord_id)
+async def add_to_queue(discord_id, game_type="ranked_arena"):
+    user = await get_user_data(discord_id)
     if not user:
-        return False
+        return False, "no_profile"
     
-    if db.in_queue.find_one({"discord_id": discord_id}):
+    if player_index.is_queued(discord_id):
         return False, "already_in_queue"
 
-    if db.in_queue.find_one({"discord_id": discord_id}) or db.games.find_one({"players.discord_id": discord_id, "result": {"$in": ["pending", "team_a", "team_b"]}}):
-        return False
+    if player_index.is_in_game(discord_id):
+        return False, "in_game"
     
-    db.in_queue.insert_one({
-        'discord_id': discord_id,
-        'ign': user['ign'],  
-        'mmr': user.get('mmr', 1000), 
-        'confidence': user.get('confidence', 300), 
-        'games_played': user.get('games_played', 0),
-        'wins': user.get('wins', 0),
-        'losses': user.get('losses', 0),
-        'queue_joined_at': datetime.now(timezone.utc),
-        'game_type': game_type
-    })
+    ensure_resolved(user)
+    try:
+        await adb.in_queue.insert_one({
+            'discord_id': discord_id,
+            'ign': user['ign'],  
+            'mmr': user.get('mmr', 1000), 
+            'confidence': user.get('confidence', 300), 
+            'games_played': user.get('games_played', 0),
+            'wins': user.get('wins', 0),
+            'losses': user.get('losses', 0),
+            'queue_joined_at': datetime.now(timezone.utc),
+            'game_type': game_type
+        })
+    except pymongo.errors.DuplicateKeyError:
+        return False, "already_in_queue"
+    player_index.add_queued(discord_id, game_type)
+    queue_trigger.notify()
     return True, "added"
 
-def remove_from_queue(discord_id):
-    result = db.in_queue.delete_one({"discord_id": discord_id})
+async def remove_from_queue(discord_id):
+    result = await adb.in_queue.delete_one({"discord_id": discord_id})
+    player_index.remove_queued(discord_id)
     return result.deleted_count > 0
 
-def move_to_ingame(discord_id, game_id, team):
-    user = get_user_data(discord_id)
-    if not user:
-        return False
-    
-    player_data = {
-        'discord_id': discord_id,
+def ingame_player(user):
+    return {
+        'discord_id': user['discord_id'],
         'ign': user['ign'],
         'mmr': user.get('mmr', 1000),
         'confidence': user.get('confidence', 300),
@@ -120,11 +147,16 @@ def move_to_ingame(discord_id, game_id, team):
         'losses': user.get('losses', 0)
     }
 
-    db.games.update_one({"_id": game_id}, {"$addToSet": {team: player_data}})
-    return True
+async def ingame_teams(team_a, team_b):
+    ids = [p['discord_id'] for p in team_a + team_b]
+    users = {u['discord_id']: u for u in await adb.users.find({'discord_id': {'$in': ids}})}
+    return (
+        [ingame_player(users[p['discord_id']]) for p in team_a if p['discord_id'] in users],
+        [ingame_player(users[p['discord_id']]) for p in team_b if p['discord_id'] in users]
+    )
 
-def create_user(discord_id, ign_tag):
-    if get_user_data(discord_id):
+async def create_user(discord_id, ign_tag):
+    if await get_user_data(discord_id):
         return None
     
     user_data = {
@@ -136,21 +168,37 @@ def create_user(discord_id, ign_tag):
         'wins': 0,
         'losses': 0
     }
-    db.users.insert_one(user_data)
+    await adb.users.insert_one(user_data)
+    profile_cache.invalidate(discord_id)
+    leaderboard.apply([{'discord_id': discord_id, 'ign': ign_tag, 'mmr': user_data['mmr']}])
+    resolve_in_background(ign_tag)
     return user_data
 
 @bot.event
 async def on_ready():
     await bot.tree.sync()
     print(f'Logged in as {bot.user}')
+    await adb.run(ensure_indexes)
+    await adb.run(normalize_queue_timestamps)
+    await adb.run(check_query_plans)
+    await adb.run(ensure_cache_indexes)
+    await adb.run(ensure_result_indexes)
+    await adb.run(ensure_ledger_indexes)
+    await player_index.rebuild(adb.run)
+    await adb.run(leaderboard.load)
+    monitor_scheduler.start()
+    queue_trigger.start(run_matchmaking)
     check_queue.start()
     check_and_update_results.start()
     channel = bot.get_channel(ALLOWED_CHANNEL_ID)
-    embed = get_queue_status_embed()
+    embed = await get_queue_status_embed()
     await post_access_ui_message(channel, embed=embed)
     refresh_access_ui_message.start()
     update_access_ui_embed.start()
     cleanup_old_draft_threads.start()
+    rollup_mmr_ledger.start()
+    rebuild_player_index.start()
+    reload_leaderboard.start()
     
 class ConfirmClearView(ui.View):
     def __init__(self):
@@ -198,7 +246,7 @@ async def create_user_command(interaction: discord.Interaction, ign_tag: str):
         await interaction.response.send_message("This command can only be used in the specified channel.", ephemeral=True)
         return
 
-    user = create_user(interaction.user.id, ign_tag)
+    user = await create_user(interaction.user.id, ign_tag)
     if user:
         await interaction.response.send_message(f'User {ign_tag} created for {interaction.user}.', ephemeral=True)
     else:
@@ -214,13 +262,20 @@ async def edit_ign_command(interaction: discord.Interaction, new_ign: str):
         )
         return
 
-    user = get_user_data(interaction.user.id)
+    user = await get_user_data(interaction.user.id)
     if not user:
         await interaction.response.send_message(
             f"No user profile found. Please register first with `/create_user`.", ephemeral=True
         )
     else:
-        db.users.update_one({"discord_id": interaction.user.id}, {"$set": {'ign': new_ign}})
+        if user.get('ign') != new_ign:
+            await adb.users.update_one(
+                {"discord_id": interaction.user.id},
+                {"$set": {'ign': new_ign}, "$unset": {'user_id': "", 'user_id_ign': ""}}
+            )
+            profile_cache.invalidate(interaction.user.id)
+            leaderboard.apply([{'discord_id': interaction.user.id, 'ign': new_ign}])
+            resolve_in_background(new_ign)
         await interaction.response.send_message(
             f"Your IGN has been updated to `{new_ign}`.", ephemeral=True
         )
@@ -231,13 +286,14 @@ async def my_data_command(interaction: discord.Interaction):
         await interaction.response.send_message("This command can only be used in the specified channel.", ephemeral=True)
         return
 
-    user = get_user_data(interaction.user.id)
+    user = await get_user_data(interaction.user.id)
     if not user:
         await interaction.response.send_message(f'No data found. Please register first.', ephemeral=True)
         return
 
     await interaction.response.send_message(f"**Your Data**\n"
         f"MMR: {user['mmr']}\n"
+        f"Rank: {format_rank(user['discord_id'])}\n"
         f"Wins: {user['wins']}\n"
         f"Losses: {user['losses']}\n"
         f"Games Played: {user['games_played']}", ephemeral=True)
@@ -248,7 +304,7 @@ async def user_data_command(interaction: discord.Interaction, ign: str):
         await interaction.response.send_message("This command can only be used in the specified channel.", ephemeral=True)
         return
 
-    user = get_user_data_by_ign(ign)
+    user = await get_user_data_by_ign(ign)
     if not user:
         await interaction.response.send_message(f'No user found with the IGN {ign}.', ephemeral=True)
         return
@@ -284,11 +340,11 @@ async def add_test_players_command(interaction: discord.Interaction):
     for ign, mmr in test_players:
         discord_id = f"test_{ign}"
 
-        if db.in_queue.find_one({"discord_id": discord_id}):
+        if await adb.in_queue.find_one({"discord_id": discord_id}):
             print(f"Player {ign} is already in the queue.")
             continue
 
-        db.in_queue.insert_one({
+        await adb.in_queue.insert_one({
             'discord_id': discord_id,
             'ign': ign,
             'mmr': mmr,
@@ -299,6 +355,7 @@ async def add_test_players_command(interaction: discord.Interaction):
             'queue_joined_at': datetime.now(timezone.utc),
             'game_type': 'draft_arena'
         })
+        player_index.add_queued(discord_id, 'draft_arena')
 
         print(f"Added {ign} with {mmr} MMR to the queue.")
 
@@ -329,11 +386,11 @@ async def add_test_users_command(interaction: discord.Interaction):
     for ign, mmr in test_players:
         discord_id = f"{ign}"
 
-        if db.users.find_one({"discord_id": discord_id}):
+        if await adb.users.find_one({"discord_id": discord_id}):
             print(f"Player {ign} already exists.")
             continue
 
-        db.users.insert_one({
+        await adb.users.insert_one({
             'discord_id': discord_id,
             'ign': ign,
             'mmr': mmr,
@@ -342,6 +399,8 @@ async def add_test_users_command(interaction: discord.Interaction):
             'wins': 0,
             'losses': 0
         })
+        profile_cache.invalidate(discord_id)
+        leaderboard.apply([{'discord_id': discord_id, 'ign': ign, 'mmr': mmr}])
 
         print(f"Added {ign} with {mmr} MMR to the users collection.")
 
@@ -349,36 +408,42 @@ async def add_test_users_command(interaction: discord.Interaction):
 
 
 async def start_matchmaking(players_in_queue_for_type, bot):
-    players = sorted(
-        players_in_queue_for_type, 
-        key=lambda x: x.get('queue_joined_at', datetime.min)
-    )
-
-    if len(players) < 8:
-        return None, None, None, None
+    """
+    Split the queue into as many lobbies as it allows and create their
+    games concurrently. Returns (team_a, team_b, game_id, game_type) per game.
+    """
+    players = players_in_queue_for_type
+    if not players:
+        return []
 
     game_type = players[0]['game_type']
     if any(p['game_type'] != game_type for p in players):
         print("[ERROR] Mixed game types in matchmaking pool. This should not happen.")
-        return None, None, None, None
-
-    oldest_8 = players[:8]
-    player_mmr = [int(p.get('mmr', 1000)) for p in oldest_8]
-
-    best_split = None
-    smallest_diff = float('inf')
-    indexes = list(range(8))
-    for team_a_idxs in combinations(indexes, 4):
-        team_b_idxs = [i for i in indexes if i not in team_a_idxs]
-        team_a_mmr = sum(player_mmr[i] for i in team_a_idxs)
-        team_b_mmr = sum(player_mmr[i] for i in team_b_idxs)
-        diff = abs(team_a_mmr - team_b_mmr)
-        if diff < smallest_diff:
-            smallest_diff = diff
-            best_split = (team_a_idxs, team_b_idxs)
-
-    team_a = [oldest_8[i] for i in best_split[0]]
-    team_b = [oldest_8[i] for i in best_split[1]]
+        return []
+
+    if len(players) < lobby_size_for(game_type):
+        return []
+
+    lobbies = form_lobbies(players, settings=settings_for(game_type))
+    if not lobbies:
+        print(f"[INFO] No {game_type} lobby within the allowed MMR spread yet ({len(players)} queued).")
+        return []
+
+    created = await asyncio.gather(
+        *(create_lobby_game(lobby, game_type, bot) for lobby in lobbies),
+        return_exceptions=True
+    )
+    games = []
+    for lobby, game in zip(lobbies, created):
+        if isinstance(game, Exception):
+            print(f"[ERROR] Could not create a {game_type} game for {', '.join(p['ign'] for p in lobby.players)}: {game}")
+        elif game:
+            games.append(game)
+    return games
+
+async def create_lobby_game(lobby, game_type, bot):
+    team_a, team_b = await ingame_teams(lobby.team_a, lobby.team_b)
+    smallest_diff = lobby.smallest_diff
 
     if smallest_diff > 50:
         print(f"Warning: Teams are not well balanced. MMR diff: {smallest_diff}")
@@ -398,12 +463,13 @@ async def start_matchmaking(players_in_queue_for_type, bot):
         game_doc_data = {
             '_id': game_id,
             'game_id': game_id,
-            'team_a': [],
-            'team_b': [],
+            'team_a': team_a,
+            'team_b': team_b,
             'result': 'pending',
             'created_at': datetime.now(timezone.utc),
             'votes': [],
             'game_type': game_type,
+            'team_size': team_size_for(game_type),
         }
 
         if game_type == "draft_arena":
@@ -424,7 +490,7 @@ async def start_matchmaking(players_in_queue_for_type, bot):
                 'hunters_available': list(HUNTERS),
                 'banned_hunters': []
             })
-        db.games.insert_one(game_doc_data)
+        await adb.games.insert_one(game_doc_data)
 
         if game_type == "draft_arena":
             announce_channel = bot.get_channel(ANNOUNCE_CHANNEL_ID)
@@ -432,7 +498,7 @@ async def start_matchmaking(players_in_queue_for_type, bot):
                 name=f"Draft {game_id}",
                 type=discord.ChannelType.public_thread
             )
-            db.games.update_one({"_id": game_id}, {
+            await adb.games.update_one({"_id": game_id}, {
                 "$set": {
                     "draft_thread_id": thread.id,
                     "draft_channel_id": thread.id
@@ -441,136 +507,117 @@ async def start_matchmaking(players_in_queue_for_type, bot):
 
     except pymongo.errors.DuplicateKeyError:
         print(f"DuplicateKeyError for {game_id} in start_matchmaking. Retrying with new ID.")
-        return None, None, None, None
-
-    for player in team_a:
-        move_to_ingame(player['discord_id'], game_id, 'team_a')
-        remove_from_queue(player['discord_id'])
-    for player in team_b:
-        move_to_ingame(player['discord_id'], game_id, 'team_b')
-        remove_from_queue(player['discord_id'])
+        return None
 
+    player_ids = [p['discord_id'] for p in lobby.players]
+    await adb.in_queue.delete_many({'discord_id': {'$in': player_ids}})
+    player_index.start_game(game_id, player_ids)
 
-    player_to_monitor = team_a[0]
-    threading.Thread(target=monitor_game_v2, args=(player_to_monitor.get('ign'), game_id, 'team_a')).start()
+    await adb.run(monitor_scheduler.watch, game_id, pick_watchers(team_a, team_b), game_type)
 
-    final_game_doc = db.games.find_one({'_id': game_id})
-    if final_game_doc:
-        return final_game_doc.get('team_a', []), final_game_doc.get('team_b', []), game_id, game_type
-    else:
-        print(f"Error: Game document {game_id} not found after insertion and updates.")
-        return None, None, None, None
+    return team_a, team_b, game_id, game_type
 
-def update_game_result(game_id, result):
-    db.games.update_one({"_id": game_id}, {"$set": {'result': result}})
+async def update_game_result(game_id, result):
+    await adb.games.update_one({"_id": game_id}, {"$set": {'result': result}})
 
-    process_match_result(game_id, result)
+    await adb.run(process_match_result, game_id, result)
+    await adb.run(leaderboard.flush)
 
 
 @tasks.loop(seconds=20)
 async def check_and_update_results():
-    games = db.games.find({
-        "$or": [
-            {'result': {'$in': ['team_a', 'team_b', 'canceled', 'timed_out']}},
-            {
-                'game_type': 'draft_arena',
-                'current_draft_stage': {'$in': ['complete', 'draft_complete']},
-                'result': {'$nin': ['processed', 'canceled', 'timed_out']}
-            }
-        ]
-    })
+    try:
+        for _ in range(RESULTS_PER_TICK):
+            game_data = await adb.run(claim_next_game)
+            if not game_data:
+                return
+            game_id = game_data.get('_id')
+            try:
+                await process_claimed_game(game_data)
+            except Exception as e:
+                print(f"[ERROR] Processing {game_id} failed, it will be retried after its lease: {e}")
+                continue
+            await adb.run(mark_processed, game_id)
+            player_index.end_game(game_id)
+    finally:
+        # Every game rated this tick lands on the leaderboard in one snapshot.
+        await adb.run(leaderboard.flush)
+
+
+async def process_claimed_game(game_data):
+    game_id = game_data.get('_id')
+    result = game_data.get('reported_result')
+    game_type = game_data.get('game_type', 'ranked_arena')
+
+    print(f"Processing result for {game_id} ({game_type}): {result}")
+
+    if result in ['canceled', 'timed_out']:
+        print(f"Game '{game_id}' has been {result}.")
+
+        draft_stage = game_data.get('current_draft_stage', '').lower()
+        if game_type == "draft_arena" and draft_stage not in ("complete", "draft_complete"):
+            if not game_data.get('announced_cancellation'):
+                channel = bot.get_channel(ANNOUNCE_CHANNEL_ID)
+                if channel:
+                    await channel.send(f"{game_id} was automatically canceled due to a {result.replace('_', ' ')}.")
+                await adb.games.update_one({'_id': game_id}, {'$set': {'announced_cancellation': True}})
+        return
 
-    for game in games:
-        game_data = game
-        game_id = game_data.get('_id')
-        result = game_data.get('result')
-        game_type = game_data.get('game_type', 'ranked_arena')  
+    result_str, mmr_changes = await adb.run(process_match_result, game_id, result)
 
-        print(f"Checking result for {game_id} ({game_type}): {result}")
+    print("DEBUG mmr_changes:", mmr_changes)
 
-        if result == 'processed':
-            print(f"{game_id} has already been processed, skipping.")
-            continue
+    if game_data.get('announced_result'):
+        print(f"{game_id} results were already announced, skipping.")
+        return
 
-        if result == 'pending':
-            draft_stage = game_data.get('current_draft_stage', '').lower()
-            if game_type == "draft_arena" and draft_stage in ("complete", "draft_complete"):
-                print(f"Draft {game_id} draft complete, awaiting game result.")
+    if result_str and mmr_changes:
+        team_a_players = []
+        team_b_players = []
+        for player in mmr_changes:
+            delta = player['delta']
+            symbol = "+" if delta >= 0 else ""
+            line = f"`{player['ign']}`: {symbol}{delta:.1f} MMR"
+            if player.get("team") == "team_a":
+                team_a_players.append(line)
+            elif player.get("team") == "team_b":
+                team_b_players.append(line)
             else:
-                print(f"The result for {game_id} is currently pending.")
-            continue
-
-        if result in ['canceled', 'timed_out']:
-            print(f"Game '{game_id}' has been {result}.")
+                print(f"[WARN] No team for {player['ign']}, putting in Team B")
+                team_b_players.append(line)
 
-            draft_stage = game_data.get('current_draft_stage', '').lower()
-            if game_type == "draft_arena" and draft_stage not in ("complete", "draft_complete"):
-                db.games.update_one({'_id': game_id}, {'$set': {'result': 'processed'}})
-
-                if not game_data.get('announced_cancellation'): 
-                    channel = bot.get_channel(ANNOUNCE_CHANNEL_ID)
-                    if channel:
-                        await channel.send(f"{game_id} was automatically canceled due to a {result.replace('_', ' ')}.")
-                    db.games.update_one({'_id': game_id}, {'$set': {'announced_cancellation': True}})
-            continue
-
-        if result in ['team_a', 'team_b']:
-            print(f"{game_id} result found: {result}")
-
-            draft_stage = game_data.get('current_draft_stage', '').lower()
-            if game_type == "draft_arena" and draft_stage not in ("complete", "draft_complete"):
-                print(f"Draft {game_id} has a result but draft not complete. Skipping MMR processing.")
-                continue
+        embed = discord.Embed(
+            title=f"{'Draft Arena' if game_type == 'draft_arena' else 'Ranked Arena'} Results: {result_str.upper()} Wins!",
+            color=discord.Color.green() if result_str == "team_a" else discord.Color.red()
+        )
+        embed.add_field(name="Team A", value="\n".join(team_a_players) or "None", inline=False)
+        embed.add_field(name="\u200b", value="────────────", inline=False)
+        embed.add_field(name="Team B", value="\n".join(team_b_players) or "None", inline=False)
+        embed.set_footer(text=f"Game ID: {game_id}")
 
-            result_str, mmr_changes = process_match_result(game_id, result)
-
-            print("DEBUG mmr_changes:", mmr_changes)
-
-            if result_str and mmr_changes:
-                team_a_players = []
-                team_b_players = []
-                for player in mmr_changes:
-                    delta = player['delta']
-                    symbol = "+" if delta >= 0 else ""
-                    line = f"`{player['ign']}`: {symbol}{delta:.1f} MMR"
-                    if player.get("team") == "team_a":
-                        team_a_players.append(line)
-                    elif player.get("team") == "team_b":
-                        team_b_players.append(line)
-                    else:
-                        print(f"[WARN] No team for {player['ign']}, putting in Team B")
-                        team_b_players.append(line)
+        if game_type == "draft_arena":
+            thread_id = game_data.get("draft_thread_id")
+            if not thread_id:
+                print(f"[ERROR] No draft_thread_id found for game {game_id}, cannot post results.")
+                return
+            thread = bot.get_channel(thread_id)
+            if thread is None:
+                try:
+                    thread = await bot.fetch_channel(thread_id)
+                except Exception as e:
+                    print(f"[ERROR] Could not fetch thread {thread_id} for results: {e}")
+                    return
+            try:
+                await thread.send(embed=embed)
+            except Exception as e:
+                print(f"[ERROR] Failed to send results to thread {thread_id}: {e}")
+                return
+        else:
+            channel = bot.get_channel(ANNOUNCE_CHANNEL_ID)
+            await channel.send(embed=embed)
 
-                embed = discord.Embed(
-                    title=f"{'Draft Arena' if game_type == 'draft_arena' else 'Ranked Arena'} Results: {result_str.upper()} Wins!",
-                    color=discord.Color.green() if result_str == "team_a" else discord.Color.red()
-                )
-                embed.add_field(name="Team A", value="\n".join(team_a_players) or "None", inline=False)
-                embed.add_field(name="\u200b", value="────────────", inline=False)
-                embed.add_field(name="Team B", value="\n".join(team_b_players) or "None", inline=False)
-                embed.set_footer(text=f"Game ID: {game_id}")
-
-                if game_type == "draft_arena":
-                    thread_id = game_data.get("draft_thread_id")
-                    if not thread_id:
-                        print(f"[ERROR] No draft_thread_id found for game {game_id}, cannot post results.")
-                        continue
-                    thread = bot.get_channel(thread_id)
-                    if thread is None:
-                        try:
-                            thread = await bot.fetch_channel(thread_id)
-                        except Exception as e:
-                            print(f"[ERROR] Could not fetch thread {thread_id} for results: {e}")
-                            continue
-                    try:
-                        await thread.send(embed=embed)
-                    except Exception as e:
-                        print(f"[ERROR] Failed to send results to thread {thread_id}: {e}")
-                else:
-                    channel = bot.get_channel(ANNOUNCE_CHANNEL_ID)
-                    await channel.send(embed=embed)
+        await adb.run(mark_announced, game_id)
 
-                db.games.update_one({'_id': game_id}, {'$set': {'result': 'processed'}})
 
 def format_team_line(team):
     for player in team:
@@ -578,90 +625,80 @@ def format_team_line(team):
     return ", ".join([f"<@{player['discord_id']}> ({player.get('ign', 'N/A')})" for player in team])
 
 
-@tasks.loop(seconds=20)
+@tasks.loop(seconds=config.get("matchmaking_sweep_seconds", 30))
 async def check_queue():
-    now = datetime.now(timezone.utc)
-    timeout_minutes = 60
-
-    players_in_queue = list(db.in_queue.find({}))
-    to_remove = []
-    for p in players_in_queue:
-        qj = p['queue_joined_at']
-        if isinstance(qj, str):
-            try:
-                qj_dt = datetime.fromisoformat(qj.replace("Z", "+00:00"))
-            except Exception:
-                qj_dt = datetime.strptime(qj, "%Y-%m-%d %H:%M:%S")
-                qj_dt = qj_dt.replace(tzinfo=timezone.utc)
-        elif qj.tzinfo is None:
-            qj_dt = qj.replace(tzinfo=timezone.utc)
-        else:
-            qj_dt = qj
-        if (now - qj_dt).total_seconds() > timeout_minutes * 60:
-            to_remove.append(p)
-
-    kicked_igns = []
-    for player in to_remove:
-        remove_from_queue(player['discord_id'])
-        kicked_igns.append(player.get('ign', 'Unknown Player'))
-
-    if kicked_igns:
+    cutoff = datetime.now(timezone.utc) - timedelta(minutes=QUEUE_TIMEOUT_MINUTES)
+    # Under the matchmaking lock so nobody is kicked while being put in a lobby.
+    async with queue_trigger.lock:
+        expired = await adb.in_queue.find({'queue_joined_at': {'$lt': cutoff}}, {'discord_id': 1, 'ign': 1})
+        if expired:
+            removed = await adb.in_queue.delete_many({'_id': {'$in': [p['_id'] for p in expired]}})
+            for player in expired:
+                player_index.remove_queued(player['discord_id'])
+            if removed.deleted_count != len(expired):
+                await player_index.rebuild(adb.run)
+
+    if expired:
         channel = bot.get_channel(ALLOWED_CHANNEL_ID)
-        kicked_list = ", ".join(kicked_igns)
+        kicked_list = ", ".join(p.get('ign', 'Unknown Player') for p in expired)
         await channel.send(
-            f"Removed from the matchmaking queue due to inactivity (60 min limit): {kicked_list}"
+            f"Removed from the matchmaking queue due to inactivity ({QUEUE_TIMEOUT_MINUTES} min limit): {kicked_list}"
         )
 
-    players_by_game_type = {
-        "ranked_arena": [],
-        "draft_arena": []
-    }
-    for player in players_in_queue:
-        gt = player.get('game_type', 'ranked_arena') 
-        if gt in players_by_game_type:
-            players_by_game_type[gt].append(player)
-        else:
-            print(f"[WARN] Unknown game type '{gt}' for player {player.get('ign')}. Skipping.")
+    if expired or queue_trigger.needs_sweep():
+        await queue_trigger.run_now(run_matchmaking)
 
+MATCHMAKING_FIELDS = {'discord_id': 1, 'ign': 1, 'mmr': 1, 'queue_joined_at': 1, 'game_type': 1}
 
-    for game_type, current_players_in_queue in players_by_game_type.items():
-        
-        if len(current_players_in_queue) >= 8:
-            
-            team_a, team_b, game_id, matched_game_type = await start_matchmaking(current_players_in_queue, bot)
+async def run_matchmaking():
+    """Form lobbies per game type. Returns True if a queue still holds enough players for a lobby."""
+    created = []
+    waiting = False
+    for game_type in ("ranked_arena", "draft_arena"):
+        players = await adb.in_queue.find({'game_type': game_type}, MATCHMAKING_FIELDS)
+        lobby_size = lobby_size_for(game_type)
+        if len(players) < lobby_size:
+            continue
+        games = await start_matchmaking(players, bot)
+        created += games
+        waiting = waiting or len(players) - lobby_size * len(games) >= lobby_size
+
+    announced = await asyncio.gather(*(announce_game(*game) for game in created), return_exceptions=True)
+    for game, error in zip(created, announced):
+        if isinstance(error, Exception):
+            print(f"[ERROR] Could not announce {game[2]}: {error}")
+    return waiting
+
+async def announce_game(team_a, team_b, game_id, game_type):
+    team_a_line = format_team_line(team_a)
+    team_b_line = format_team_line(team_b)
+
+    announce_channel = bot.get_channel(ANNOUNCE_CHANNEL_ID)
+    if announce_channel is None:
+        print(f"[ERROR] Could not find announce channel with ID: {ANNOUNCE_CHANNEL_ID}")
+        return
 
-            if team_a and team_b and game_id:
-                team_a_line = format_team_line(team_a)
-                team_b_line = format_team_line(team_b)
+    if game_type == "draft_arena":
+        game = await adb.games.find_one({"_id": game_id})
+        thread_id = game["draft_channel_id"]
+        thread = bot.get_channel(thread_id)
 
-                announce_channel = bot.get_channel(ANNOUNCE_CHANNEL_ID)
-                if announce_channel is None:
-                    print(f"[ERROR] Could not find announce channel with ID: {ANNOUNCE_CHANNEL_ID}")
-                    return
+        await thread.send(f"------------------------------------------------------------------------------------------------------------------------------------\n"
+                                    f"## Draft Arena Matchmaking successful!\n"
+                                    f"Game ID: {game_id}\n"
+                                    f"Team A: {team_a_line}\n"
+                                    f"Team B: {team_b_line}\n"
+                                    f"The draft process will begin publicly here!\n"
+                                    f"------------------------------------------------------------------------------------------------------------------------------------")
 
-                if matched_game_type == "draft_arena":
-                    game = db.games.find_one({"_id": game_id})
-                    thread_id = game["draft_channel_id"]
-                    thread = bot.get_channel(thread_id)
-
-                    await thread.send(f"------------------------------------------------------------------------------------------------------------------------------------\n"
-                                                f"## Draft Arena Matchmaking successful!\n"
-                                                f"Game ID: {game_id}\n"
-                                                f"Team A: {team_a_line}\n"
-                                                f"Team B: {team_b_line}\n"
-                                                f"The draft process will begin publicly here!\n"
-                                                f"------------------------------------------------------------------------------------------------------------------------------------")
-
-                    final_game_doc = db.games.find_one({'_id': game_id})
-                    if final_game_doc is not None:
-                        await prompt_captains_ready(final_game_doc, bot)
-                else:
-                    await announce_channel.send(f"------------------------------------------------------------------------------------------------------------------------------------\n"
-                                                f"## Ranked Arena Matchmaking successful!\n"
-                                                f"Game ID: {game_id}\n"
-                                                f"Team A: {team_a_line}\n"
-                                                f"Team B: {team_b_line}\n"
-                                                f"------------------------------------------------------------------------------------------------------------------------------------")
+        await prompt_captains_ready(game, bot)
+    else:
+        await announce_channel.send(f"------------------------------------------------------------------------------------------------------------------------------------\n"
+                                    f"## Ranked Arena Matchmaking successful!\n"
+                                    f"Game ID: {game_id}\n"
+                                    f"Team A: {team_a_line}\n"
+                                    f"Team B: {team_b_line}\n"
+                                    f"------------------------------------------------------------------------------------------------------------------------------------")
 
     
 @bot.tree.command(name="leaderboard", description="Display the top-ranked players.")
@@ -670,61 +707,219 @@ async def leaderboard_command(interaction: discord.Interaction):
         await interaction.response.send_message("This command can only be used in the specified channel.", ephemeral=True)
         return
 
-    users = list(db.users.find({}).sort("mmr", pymongo.DESCENDING))
-    leaderboard_data = users 
-
     class LeaderboardView(ui.View):
-        def __init__(self, data, per_page=10):
+        def __init__(self, per_page=10):
             super().__init__(timeout=None)
-            self.data = data
             self.per_page = per_page
             self.page = 0
-            self.max_page = (len(data) - 1) // per_page
+            self.update_buttons()
 
-            self.prev_button.disabled = True
-            self.next_button.disabled = self.max_page == 0
-
-        async def update_message(self, interaction: discord.Interaction):
-            start = self.page * self.per_page
-            end = start + self.per_page
-            entries = self.data[start:end]
+        def update_buttons(self):
+            max_page = leaderboard.snapshot.page_count(self.per_page) - 1
+            self.page = min(self.page, max_page)
+            self.prev_button.disabled = self.page == 0
+            self.next_button.disabled = self.page == max_page
 
-            leaderboard_text = "\n".join([
-                f"{start + i + 1}. {user.get('ign', 'N/A')} - {int(user.get('mmr', 0))} MMR"
-                for i, user in enumerate(entries)
-            ])
-            content = f"**Leaderboard** (Page {self.page + 1}/{self.max_page + 1}):\n{leaderboard_text}"
-            await interaction.response.edit_message(content=content, view=self)
+        def render(self):
+            header, text = format_leaderboard_page(self.page, self.per_page)
+            return f"**Leaderboard** {header}\n{text}"
 
         @ui.button(label="◀️", style=discord.ButtonStyle.secondary)
         async def prev_button(self, interaction: discord.Interaction, button: ui.Button):
             self.page = max(0, self.page - 1)
-            self.prev_button.disabled = self.page == 0
-            self.next_button.disabled = self.page == self.max_page
-            await self.update_message(interaction)
+            self.update_buttons()
+            await interaction.response.edit_message(content=self.render(), view=self)
 
         @ui.button(label="▶️", style=discord.ButtonStyle.secondary)
         async def next_button(self, interaction: discord.Interaction, button: ui.Button):
-            self.page = min(self.max_page, self.page + 1)
-            self.prev_button.disabled = self.page == 0
-            self.next_button.disabled = self.page == self.max_page
-            await self.update_message(interaction)
-
-    view = LeaderboardView(leaderboard_data)
-    start = 0
-    end = 10
-    entries = leaderboard_data[start:end]
-    leaderboard_text = "\n".join([
-        f"{i + 1}. {user.get('ign', 'N/A')} - {int(user.get('mmr', 0))} MMR"
-        for i, user in enumerate(entries)
-    ])
+            self.page += 1
+            self.update_buttons()
+            await interaction.response.edit_message(content=self.render(), view=self)
+
+    view = LeaderboardView()
+    await interaction.response.send_message(content=view.render(), view=view, ephemeral=True)
+
+def format_rank(discord_id, snapshot=None):
+    snapshot = leaderboard.snapshot if snapshot is None else snapshot
+    rank = snapshot.rank_of(discord_id)
+    if rank is None:
+        return "Unranked"
+    return f"#{rank} of {len(snapshot)} (top {100 - snapshot.percentile(discord_id):.1f}%)"
+
+@bot.tree.command(name="rank", description="Show your rank, or another player's by IGN, and the players around it.")
+async def rank_command(interaction: discord.Interaction, ign: str = None):
+    if not check_channel(interaction):
+        await interaction.response.send_message("This command can only be used in the specified channel.", ephemeral=True)
+        return
+
+    user = await get_user_data_by_ign(ign) if ign else await get_user_data(interaction.user.id)
+    if not user:
+        await interaction.response.send_message(
+            f'No user found with the IGN {ign}.' if ign else 'No data found. Please register first.', ephemeral=True)
+        return
+
+    snapshot = leaderboard.snapshot
+    own_rank = snapshot.rank_of(user['discord_id'])
+    lines = [
+        f"{'➡️ ' if rank == own_rank else ''}{rank}. {rank_ign} - {int(mmr)} MMR"
+        for rank, rank_ign, mmr in snapshot.around(user['discord_id'], radius=5)
+    ]
     await interaction.response.send_message(
-        content=f"**Leaderboard** (Page 1/{view.max_page + 1}):\n{leaderboard_text}",
-        view=view,
+        f"**{user.get('ign', 'N/A')}** is ranked {format_rank(user['discord_id'], snapshot)}\n" + "\n".join(lines),
         ephemeral=True
     )
 
-@bot.tree.command(name="vote_stop", description="Vote to stop/cancel an ongoing game. Needs 6 out of 8 to succeed.")
+def format_leaderboard_page(page, per_page):
+    """Page header and lines of one page of the current leaderboard snapshot."""
+    snapshot = leaderboard.snapshot
+    text = "\n".join(
+        f"{rank}. {ign} - {int(mmr)} MMR" for rank, ign, mmr in snapshot.page(page, per_page)
+    )
+    return f"(Page {page + 1}/{snapshot.page_count(per_page)}):", text
+
+def format_history_page(ign, events, rollups, page):
+    lines = []
+    for event in events:
+        delta = event['delta']
+        symbol = "+" if delta >= 0 else ""
+        lines.append(
+            f"`{event['at']:%Y-%m-%d}` {event.get('game_id', 'N/A')}: {symbol}{delta:.1f} → "
+            f"{int(event['mu_after'])} MMR ({event.get('result', 'N/A')})"
+        )
+    if rollups:
+        lines.append("**Earlier months:**")
+        for rollup in rollups:
+            symbol = "+" if rollup['delta_total'] >= 0 else ""
+            lines.append(
+                f"`{rollup['month']}` {rollup['games']} games ({rollup['wins']}W/{rollup['losses']}L): "
+                f"{symbol}{rollup['delta_total']:.1f} → {int(rollup['mu_end'])} MMR"
+            )
+    text = "\n".join(lines) or "No rated games yet."
+    return f"**MMR history for {ign}** (Page {page + 1}):\n{text}"
+
+
+class HistoryView(ui.View):
+    def __init__(self, discord_id, ign, per_page=10):
+        super().__init__(timeout=300)
+        self.discord_id = discord_id
+        self.ign = ign
+        self.per_page = per_page
+        self.cursors = [None]
+        self.next_cursor = None
+
+    async def render(self):
+        page = len(self.cursors) - 1
+        events, self.next_cursor = await adb.run(get_history, self.discord_id, self.per_page, self.cursors[-1])
+        rollups = await adb.run(get_rollups, self.discord_id) if self.next_cursor is None else []
+        self.prev_button.disabled = page == 0
+        self.next_button.disabled = self.next_cursor is None
+        return format_history_page(self.ign, events, rollups, page)
+
+    @ui.button(label="◀️", style=discord.ButtonStyle.secondary)
+    async def prev_button(self, interaction: discord.Interaction, button: ui.Button):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+        await interaction.response.edit_message(content=await self.render(), view=self)
+
+    @ui.button(label="▶️", style=discord.ButtonStyle.secondary)
+    async def next_button(self, interaction: discord.Interaction, button: ui.Button):
+        if self.next_cursor is not None:
+            self.cursors.append(self.next_cursor)
+        await interaction.response.edit_message(content=await self.render(), view=self)
+
+
+@bot.tree.command(name="history", description="View your MMR history, or another player's by IGN.")
+async def history_command(interaction: discord.Interaction, ign: str = None):
+    if not check_channel(interaction):
+        await interaction.response.send_message("This command can only be used in the specified channel.", ephemeral=True)
+        return
+
+    user = await get_user_data_by_ign(ign) if ign else await get_user_data(interaction.user.id)
+    if not user:
+        await interaction.response.send_message(
+            f'No user found with the IGN {ign}.' if ign else 'No data found. Please register first.', ephemeral=True)
+        return
+
+    view = HistoryView(user['discord_id'], user.get('ign', 'N/A'), per_page=config.get("history_page_size", 10))
+    await interaction.response.send_message(content=await view.render(), view=view, ephemeral=True)
+
+
+@bot.tree.command(name="cache_stats", description="Show profile cache and database call statistics.")
+async def cache_stats_command(interaction: discord.Interaction):
+    if not has_permission(interaction):
+        await interaction.response.send_message(
+            "You don't have the required permissions to use this command", ephemeral=True)
+        return
+
+    cache = profile_cache.stats()
+    lines = [
+        f"**Profile cache:** {cache['size']} entries, {cache['hits']} hits, {cache['misses']} misses "
+        f"({cache['hit_rate'] * 100:.1f}% hit rate), {cache['invalidations']} invalidations",
+        "**Busiest database calls:**"
+    ]
+    calls = sorted(adb.stats.summary().items(), key=lambda item: item[1]['calls'], reverse=True)[:10]
+    for name, call in calls:
+        lines.append(f"`{name}`: {call['calls']} calls, avg {call['avg_ms']} ms, max {call['max_ms']} ms")
+    await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
+
+@tasks.loop(minutes=config.get("player_index_rebuild_minutes", 5))
+async def rebuild_player_index():
+    try:
+        queued = set(player_index.queued)
+        await player_index.rebuild(adb.run)
+        if set(player_index.queued) - queued:
+            # Someone joined from another process and its signal never reached us.
+            queue_trigger.notify()
+    except Exception as e:
+        print(f"[ERROR] Rebuilding the player index failed: {e}")
+
+
+@tasks.loop(minutes=config.get("leaderboard_reload_minutes", 60))
+async def reload_leaderboard():
+    if reload_leaderboard.current_loop == 0:
+        return
+    try:
+        await adb.run(leaderboard.load)
+    except Exception as e:
+        print(f"[ERROR] Reloading the leaderboard failed: {e}")
+
+
+@tasks.loop(hours=24)
+async def rollup_mmr_ledger():
+    try:
+        await adb.run(rollup_ledger)
+    except Exception as e:
+        print(f"[ERROR] MMR ledger rollup failed: {e}")
+
+
+@bot.tree.command(name="game_over", description="Report that your match has ended so the result is checked right away.")
+async def game_over_command(interaction: discord.Interaction, game_id: str):
+    if not check_channel(interaction):
+        await interaction.response.send_message(
+            "This command can only be used in the specified channel.", ephemeral=True)
+        return
+
+    game_data = await adb.games.find_one({"_id": game_id}, {"result": 1, "team_a.discord_id": 1, "team_b.discord_id": 1})
+    if not game_data:
+        await interaction.response.send_message(f"{game_id} not found.", ephemeral=True)
+        return
+
+    players = {str(p.get('discord_id')) for p in game_data.get('team_a', []) + game_data.get('team_b', [])}
+    if str(interaction.user.id) not in players:
+        await interaction.response.send_message(
+            "Only players in this game can report it as finished.", ephemeral=True)
+        return
+
+    if game_data.get('result') != 'pending' or not await adb.run(monitor_scheduler.wake, game_id):
+        await interaction.response.send_message(
+            f"{game_id} is not waiting for a result.", ephemeral=True)
+        return
+
+    await interaction.response.send_message(
+        f"Thanks! Checking the result of {game_id} now.", ephemeral=True)
+
+@bot.tree.command(name="vote_stop", description="Vote to stop/cancel an ongoing game. Needs 3/4 of the players to succeed.")
 async def vote_stop_command(interaction: discord.Interaction, game_id: str):
     if not check_channel(interaction):
         await interaction.response.send_message(
@@ -732,13 +927,13 @@ async def vote_stop_command(interaction: discord.Interaction, game_id: str):
         return
 
 
-    game_data = db.games.find_one({"_id": game_id})
+    game_data = await adb.games.find_one({"_id": game_id})
     if not game_data:
         await interaction.response.send_message(
             f"{game_id} not found.", ephemeral=True)
         return
 
-    if game_data.get('result') in ['canceled', 'processed', 'timed_out', 'team_a', 'team_b']:
+    if game_data.get('result') in FINISHED_RESULTS:
         await interaction.response.send_message(
             f"{game_id} is already finished or canceled.", ephemeral=True)
         return
@@ -759,19 +954,27 @@ async def vote_stop_command(interaction: discord.Interaction, game_id: str):
         return
 
     votes.append(interaction.user.id)
-    db.games.update_one({"_id": game_id}, {"$set": {"votes": votes}})
+    await adb.games.update_one({"_id": game_id}, {"$set": {"votes": votes}})
 
-    if len(votes) >= 6:
-        db.games.update_one({"_id": game_id}, {"$set": {"result": "canceled"}})
+    player_count = len(allowed_voters)
+    needed = votes_needed(player_count)
+    if len(votes) >= needed:
+        canceled = await adb.games.update_one({"_id": game_id, "result": "pending"}, {"$set": {"result": "canceled"}})
+        if not canceled.modified_count:
+            await interaction.response.send_message(
+                f"{game_id} finished before the vote passed.", ephemeral=True)
+            return
+        await adb.run(monitor_scheduler.cancel, game_id)
+        player_index.end_game(game_id)
         channel = bot.get_channel(ANNOUNCE_CHANNEL_ID)
         await channel.send(
-            f"{game_id} has been canceled by vote (6/8 or more players agreed). No MMR has been changed."
+            f"{game_id} has been canceled by vote ({needed}/{player_count} or more players agreed). No MMR has been changed."
         )
         await interaction.response.send_message(
             "Your vote was counted and the game is now canceled.", ephemeral=True)
     else:
         await interaction.response.send_message(
-            f"Your vote was counted. {len(votes)}/8 players have voted to cancel {game_id}. (Need 6 total)",
+            f"Your vote was counted. {len(votes)}/{player_count} players have voted to cancel {game_id}. (Need {needed} total)",
             ephemeral=True
         )
 
@@ -780,25 +983,8 @@ class MainPanelView(ui.View):
     def __init__(self, user_id):
         super().__init__(timeout=None)
         self.user_id = user_id
-        self.in_queue = self.is_user_in_queue(user_id)
         self.update_button_states(user_id)
 
-    def is_user_in_queue(self, user_id):
-        return db.in_queue.find_one({"discord_id": user_id}) is not None
-
-    def update_button_states(self, user_id):
-        in_queue = self.is_user_in_queue(user_id)
-        if in_queue:
-            self.start_ranked_queue.label = "Stop Ranked Queue"
-            self.start_ranked_queue.style = discord.ButtonStyle.red
-            self.start_draft_queue.label = "Stop Draft Queue"
-            self.start_draft_queue.style = discord.ButtonStyle.red
-        else:
-            self.start_ranked_queue.label = "Start Ranked Queue"
-            self.start_ranked_queue.style = discord.ButtonStyle.blurple
-            self.start_draft_queue.label = "Start Draft Queue"
-            self.start_draft_queue.style = discord.ButtonStyle.red
-
     @ui.button(label="Start Ranked Queue", style=discord.ButtonStyle.blurple, custom_id="start_ranked_queue_button")
     async def start_ranked_queue(self, interaction: discord.Interaction, button: ui.Button):
         await self._handle_queue_button(interaction, "ranked_arena", button)
@@ -814,10 +1000,10 @@ class MainPanelView(ui.View):
             ign_tag = ui.TextInput(label="Enter your IGN#TAG", required=True, max_length=32)
             async def on_submit(modal_self, interaction2: discord.Interaction):
                 user_id = interaction2.user.id
-                user_data = db.users.find_one({"discord_id": user_id})
+                user_data = await get_user_data(user_id)
 
                 if not user_data:
-                    db.users.insert_one({
+                    await adb.users.insert_one({
                         'discord_id': user_id,
                         'ign': str(modal_self.ign_tag),
                         'mmr': 1000,
@@ -826,11 +1012,17 @@ class MainPanelView(ui.View):
                         'wins': 0,
                         'losses': 0
                     })
-                else:
-                    db.users.update_one(
+                    profile_cache.invalidate(user_id)
+                    leaderboard.apply([{'discord_id': user_id, 'ign': str(modal_self.ign_tag), 'mmr': 1000}])
+                    resolve_in_background(str(modal_self.ign_tag))
+                elif user_data.get('ign') != str(modal_self.ign_tag):
+                    await adb.users.update_one(
                         {"discord_id": user_id},
-                        {"$set": {'ign': str(modal_self.ign_tag)}}
+                        {"$set": {'ign': str(modal_self.ign_tag)}, "$unset": {'user_id': "", 'user_id_ign': ""}}
                     )
+                    profile_cache.invalidate(user_id)
+                    leaderboard.apply([{'discord_id': user_id, 'ign': str(modal_self.ign_tag)}])
+                    resolve_in_background(str(modal_self.ign_tag))
 
                 embed = discord.Embed(title="✅ IGN Updated!", color=discord.Color.green())
                 embed.description = f"Your IGN is now: **{modal_self.ign_tag}**"
@@ -844,8 +1036,8 @@ class MainPanelView(ui.View):
     @ui.button(label="Check Queue", style=discord.ButtonStyle.gray)
     async def check_queue(self, interaction: discord.Interaction, button: ui.Button):
 
-        ranked_players = list(db.in_queue.find({"game_type": "ranked_arena"}).sort("queue_joined_at", pymongo.ASCENDING))
-        draft_players = list(db.in_queue.find({"game_type": "draft_arena"}).sort("queue_joined_at", pymongo.ASCENDING))
+        ranked_players = await adb.in_queue.find({"game_type": "ranked_arena"}, sort=[("queue_joined_at", pymongo.ASCENDING)])
+        draft_players = await adb.in_queue.find({"game_type": "draft_arena"}, sort=[("queue_joined_at", pymongo.ASCENDING)])
 
         embed = discord.Embed(title="Queue Status", color=discord.Color.blue())
 
@@ -859,7 +1051,7 @@ class MainPanelView(ui.View):
                 mmr = int(round(player_data.get('mmr', 1000)))
                 ranked_list.append(f"{ign} - {mmr} MMR")
             ranked_desc = "\n".join(ranked_list)
-        embed.add_field(name=f"Ranked Arena Queue ({len(ranked_players)}/8)", value=ranked_desc, inline=False)
+        embed.add_field(name=f"Ranked Arena Queue ({len(ranked_players)}/{lobby_size_for('ranked_arena')})", value=ranked_desc, inline=False)
 
 
         embed.add_field(name="\u200b", value="\u200b", inline=False)
@@ -874,7 +1066,7 @@ class MainPanelView(ui.View):
                 mmr = int(round(player_data.get('mmr', 1000)))
                 draft_list.append(f"{ign} - {mmr} MMR")
             draft_desc = "\n".join(draft_list)
-        embed.add_field(name=f"Draft Arena Queue ({len(draft_players)}/8)", value=draft_desc, inline=False)
+        embed.add_field(name=f"Draft Arena Queue ({len(draft_players)}/{lobby_size_for('draft_arena')})", value=draft_desc, inline=False)
 
         embed.set_footer(text="Updated automatically every 30 seconds.")
 
@@ -886,11 +1078,12 @@ class MainPanelView(ui.View):
 
     @ui.button(label="My Data", style=discord.ButtonStyle.blurple)
     async def my_data(self, interaction: discord.Interaction, button: ui.Button):
-        user_data = get_user_data(interaction.user.id)
+        user_data = await get_user_data(interaction.user.id)
         if user_data:
             embed = discord.Embed(title="📊 Your Data", color=discord.Color.blue())
             embed.add_field(name="IGN", value=user_data['ign'], inline=False)
             embed.add_field(name="MMR", value=str(user_data['mmr']), inline=True)
+            embed.add_field(name="Rank", value=format_rank(user_data['discord_id']), inline=True)
             embed.add_field(name="Wins", value=str(user_data['wins']), inline=True)
             embed.add_field(name="Losses", value=str(user_data['losses']), inline=True)
             embed.add_field(name="Games Played", value=str(user_data['games_played']), inline=True)
@@ -909,7 +1102,7 @@ class MainPanelView(ui.View):
             search_ign = ui.TextInput(label="Enter IGN#TAG to lookup", required=True, max_length=32)
             async def on_submit(modal_self, interaction2: discord.Interaction):
                 try:
-                    other_user = get_user_data_by_ign(str(modal_self.search_ign))
+                    other_user = await get_user_data_by_ign(str(modal_self.search_ign))
                     if other_user:
                         embed = discord.Embed(title=f"User Data for {modal_self.search_ign}", color=discord.Color.purple())
                         embed.add_field(name="MMR", value=str(other_user['mmr']), inline=True)
@@ -934,11 +1127,7 @@ class MainPanelView(ui.View):
 
     @ui.button(label="Leaderboard", style=discord.ButtonStyle.gray)
     async def leaderboard(self, interaction: discord.Interaction, button: ui.Button):
-        users = list(db.users.find({}))
-        leaderboard_data = sorted(users, key=lambda x: x.get('mmr', 0), reverse=True)
-        page = 0
-
-        view = LeaderboardPanelView(leaderboard_data, page=page, panel_view=self)
+        view = LeaderboardPanelView(page=0, panel_view=self)
         embed = view.get_embed()
         await interaction.response.edit_message(embed=embed, view=view)
 
@@ -948,7 +1137,7 @@ class MainPanelView(ui.View):
         class VoteModal(ui.Modal, title="Vote to Stop Game"):
             game_id = ui.TextInput(label="Enter Game ID", required=True, max_length=20)
             async def on_submit(modal_self, interaction2: discord.Interaction):
-                success, msg = process_vote_stop(interaction2.user.id, str(modal_self.game_id))
+                success, msg = await process_vote_stop(interaction2.user.id, str(modal_self.game_id))
                 if success:
                     embed = discord.Embed(title="Vote Stop", description=msg, color=discord.Color.green())
                     if "has been canceled by vote" in msg:
@@ -966,7 +1155,7 @@ class MainPanelView(ui.View):
 
     async def _handle_queue_button(self, interaction: discord.Interaction, game_type: str, button: ui.Button):
         user_id = interaction.user.id
-        user_profile = get_user_data(user_id)
+        user_profile = await get_user_data(user_id)
         if not user_profile:
             embed = discord.Embed(title="Error", description="You need to create a user profile first using 'Create/Edit IGN'.", color=discord.Color.red())
             await interaction.response.edit_message(
@@ -975,18 +1164,18 @@ class MainPanelView(ui.View):
             )
             return
 
-        current_queue_doc = db.in_queue.find_one({"discord_id": user_id})
-        in_game = is_user_in_ongoing_game(user_id)
+        queue_type = player_index.queue_type(user_id)
+        in_game = player_index.is_in_game(user_id)
         embed = discord.Embed()
 
         if in_game:
             embed.title = "Error"
             embed.description = "You are already in an ongoing game. Wait for it to finish before queueing again."
             embed.color = discord.Color.red()
-        elif current_queue_doc:
-            if current_queue_doc['game_type'] == game_type:
+        elif queue_type:
+            if queue_type == game_type:
 
-                if remove_from_queue(user_id):
+                if await remove_from_queue(user_id):
                     embed.title = f"❌ You left the {game_type.replace('_', ' ').title()} queue!"
                     embed.description = f"You're no longer waiting for a {game_type.replace('_', ' ')} game."
 
@@ -1001,11 +1190,11 @@ class MainPanelView(ui.View):
             else:
 
                 embed.title = "Error"
-                embed.description = f"You are already in the **{current_queue_doc['game_type'].replace('_', ' ').title()}** queue. Please leave it first before joining another."
+                embed.description = f"You are already in the **{queue_type.replace('_', ' ').title()}** queue. Please leave it first before joining another."
                 embed.color = discord.Color.red()
         else:
 
-            success, reason = add_to_queue(user_id, game_type)
+            success, reason = await add_to_queue(user_id, game_type)
             if success:
                 embed.title = f"🚦 You joined the {game_type.replace('_', ' ').title()} queue!"
                 embed.description = f"You're now waiting for a {game_type.replace('_', ' ')} game."
@@ -1034,30 +1223,9 @@ class MainPanelView(ui.View):
             embed=embed, view=self
         )
 
-    def is_user_in_ongoing_game(user_id):
-        ongoing_games = list(db.games.find({
-            "$or": [
-                {'result': {'$in': ['pending', 'team_a', 'team_b']}}, 
-                { 
-                    'game_type': "draft_arena",
-                    'result': {'$ne': 'processed'}, 
-                    'current_draft_stage': {'$nin': ["complete", "timed_out_draft_ready_check", "timed_out_draft_coinflip", "timed_out_draft_turn"]}
-                }
-            ]
-        }))
-        for game in ongoing_games:
-            team_a = game.get('team_a', [])
-            team_b = game.get('team_b', [])
-            ids_in_a = {str(p.get('discord_id')) for p in team_a}
-            ids_in_b = {str(p.get('discord_id')) for p in team_b}
-            if str(user_id) in ids_in_a or str(user_id) in ids_in_b:
-                return True
-        return False
-
     def update_button_states(self, user_id):
-        current_queue_doc = db.in_queue.find_one({"discord_id": user_id})
-        in_game = is_user_in_ongoing_game(user_id)
-
+        queue_type = player_index.queue_type(user_id)
+        in_game = player_index.is_in_game(user_id)
 
         self.start_ranked_queue.disabled = False
         self.start_draft_queue.disabled = False
@@ -1069,12 +1237,12 @@ class MainPanelView(ui.View):
         if in_game:
             self.start_ranked_queue.disabled = True
             self.start_draft_queue.disabled = True
-        elif current_queue_doc:
-            if current_queue_doc['game_type'] == "ranked_arena":
+        elif queue_type:
+            if queue_type == "ranked_arena":
                 self.start_ranked_queue.label = "Stop Ranked Queue"
                 self.start_ranked_queue.style = discord.ButtonStyle.red
                 self.start_draft_queue.disabled = True
-            elif current_queue_doc['game_type'] == "draft_arena":
+            elif queue_type == "draft_arena":
                 self.start_draft_queue.label = "Stop Draft Queue"
                 self.start_draft_queue.style = discord.ButtonStyle.green 
                 self.start_ranked_queue.disabled = True
@@ -1131,11 +1299,11 @@ class ReadyCheckView(discord.ui.View):
         await interaction.response.edit_message(view=self)
 
 
-        db.games.update_one({"_id": self.game_id}, {"$addToSet": {"captains_ready": self.captain_id}})
+        await adb.games.update_one({"_id": self.game_id}, {"$addToSet": {"captains_ready": self.captain_id}})
         await interaction.followup.send("You are marked as ready! Waiting for the other captain...", ephemeral=True)
 
 
-        game = db.games.find_one({"_id": self.game_id})
+        game = await adb.games.find_one({"_id": self.game_id})
 
         if len(game.get("captains_ready", [])) == 2 and game.get("current_draft_stage") == "ready_check":
             thread = bot.get_channel(game["draft_channel_id"])
@@ -1143,10 +1311,11 @@ class ReadyCheckView(discord.ui.View):
             await start_coinflip_phase(game, self.bot)
 
     async def on_timeout(game, self):
-        game = db.games.find_one({"_id": self.game_id})
-        game_doc = db.games.find_one({"_id": self.game_id})
+        game = await adb.games.find_one({"_id": self.game_id})
+        game_doc = await adb.games.find_one({"_id": self.game_id})
         if game_doc and game_doc.get('current_draft_stage') == "ready_check":
-            db.games.update_one({"_id": self.game_id}, {"$set": {"result": "timed_out_draft_ready_check"}})
+            await adb.games.update_one({"_id": self.game_id}, {"$set": {"result": "timed_out_draft_ready_check"}})
+            player_index.end_game(self.game_id)
             thread = bot.get_channel(game["draft_channel_id"])
             if thread:
                 await thread.send(f"Draft game {self.game_id} timed out during ready check. Game canceled.")
@@ -1158,10 +1327,10 @@ async def start_coinflip_phase(game, bot):
         f"<@{captain_to_choose}>, please choose Heads or Tails to determine who drafts first!",
         view=CoinflipView(game["_id"], captain_to_choose, bot)
     )
-    db.games.update_one({"_id": game["_id"]}, {"$set": {"current_draft_stage": "coinflip"}})
+    await adb.games.update_one({"_id": game["_id"]}, {"$set": {"current_draft_stage": "coinflip"}})
 
-def get_other_captain(game_id, captain_id):
-    game = db.games.find_one({"_id": game_id})
+async def get_other_captain(game_id, captain_id):
+    game = await adb.games.find_one({"_id": game_id})
     a = game["captain_a_discord_id"]
     b = game["captain_b_discord_id"]
     return b if captain_id == a else a
@@ -1198,13 +1367,13 @@ class CoinflipView(discord.ui.View):
         flip_result = random.choice(["heads", "tails"])
         win = (choice == flip_result)
 
-        game = db.games.find_one({"_id": self.game_id})
+        game = await adb.games.find_one({"_id": self.game_id})
         captain_a = game["captain_a_discord_id"]
         captain_b = game["captain_b_discord_id"]
         winner_captain_id = self.captain_id if win else (captain_b if self.captain_id == captain_a else captain_a)
         first_action_type = "ban"
 
-        db.games.update_one(
+        await adb.games.update_one(
             {"_id": self.game_id},
             {"$set": {
                 "coinflip_choice": choice,
@@ -1222,35 +1391,36 @@ class CoinflipView(discord.ui.View):
             ephemeral=True
         )
 
-        game = db.games.find_one({"_id": self.game_id})
+        game = await adb.games.find_one({"_id": self.game_id})
         thread = self.bot.get_channel(game["draft_channel_id"])
         await thread.send(
             f"Coinflip! <@{self.captain_id}> chose **{choice}**. The coin landed on **{flip_result}**.\n"
             f"<@{winner_captain_id}> will start the draft!"
         )
 
-        updated_game = db.games.find_one({"_id": self.game_id})
+        updated_game = await adb.games.find_one({"_id": self.game_id})
         available_hunters = updated_game["hunters_available"]
         msg = await thread.send(
             f"<@{winner_captain_id}>, it's your turn to {first_action_type}:",
             view=DraftActionView(self.game_id, available_hunters, winner_captain_id, first_action_type, self.bot, ephemeral_tracker)
         )
-        db.games.update_one({"_id": self.game_id}, {"$set": {"draft_action_msg_id": msg.id}})
+        await adb.games.update_one({"_id": self.game_id}, {"$set": {"draft_action_msg_id": msg.id}})
 
         await update_draft_message(self.game_id, thread, self.bot)
 
     async def on_timeout(game, self):
-        game = db.games.find_one({"_id": self.game_id})
-        game_doc = db.games.find_one({"_id": self.game_id})
+        game = await adb.games.find_one({"_id": self.game_id})
+        game_doc = await adb.games.find_one({"_id": self.game_id})
         if game_doc and game_doc.get('current_draft_stage') == "coinflip":
-            db.games.update_one({"_id": self.game_id}, {"$set": {"result": "timed_out_draft_coinflip"}})
+            await adb.games.update_one({"_id": self.game_id}, {"$set": {"result": "timed_out_draft_coinflip"}})
+            player_index.end_game(self.game_id)
             thread = self.bot.get_channel(game["draft_channel_id"])
             if thread:
                 await thread.send(f"Draft game {self.game_id} timed out during coinflip. Game canceled.")
 
 
 async def update_draft_message(game_id, thread, bot):
-    game = db.games.find_one({"_id": game_id})
+    game = await adb.games.find_one({"_id": game_id})
 
     is_complete = game.get("current_draft_stage", "").lower() in ["complete", "completed"]
 
@@ -1301,7 +1471,7 @@ async def update_draft_message(game_id, thread, bot):
                 coinflip_str += f"\nWinner: <@{winner_captain}>"
                 
 
-    game = db.games.find_one({"_id": game_id})
+    game = await adb.games.find_one({"_id": game_id})
 
     embed = discord.Embed(
         title=f"Draft Status: {game.get('game_id', game_id)}",
@@ -1328,10 +1498,10 @@ async def update_draft_message(game_id, thread, bot):
         except discord.NotFound:
 
             msg = await thread.send(embed=embed)
-            db.games.update_one({"_id": game_id}, {"$set": {"draft_message_id": msg.id}})
+            await adb.games.update_one({"_id": game_id}, {"$set": {"draft_message_id": msg.id}})
     else:
         msg = await thread.send(embed=embed)
-        db.games.update_one({"_id": game_id}, {"$set": {"draft_message_id": msg.id}})
+        await adb.games.update_one({"_id": game_id}, {"$set": {"draft_message_id": msg.id}})
 
 
 class DraftActionView(discord.ui.View):
@@ -1339,7 +1509,7 @@ class DraftActionView(discord.ui.View):
         super().__init__(timeout=None)
         self.add_item(DraftActionSelect(game_id, available, captain_id, action_type, bot, ephemeral_tracker))
 
-def get_next_turn_and_phase(game, last_action_type):
+async def get_next_turn_and_phase(game, last_action_type):
 
     a_id = game["captain_a_discord_id"]
     b_id = game["captain_b_discord_id"]
@@ -1352,31 +1522,19 @@ def get_next_turn_and_phase(game, last_action_type):
         second = a_id
 
 
-    draft_turns = [
-        (first, "ban"),  
-        (second, "ban"),   
-        (first, "pick"),  
-        (second, "pick"),  
-        (second, "pick"),  
-        (first, "pick"),   
-        (second, "pick"), 
-        (first, "pick"),   
-        (first, "pick"),  
-        (second, "pick"),  
-    ]
+    turns = draft_turns(game.get("team_size", team_size_for("draft_arena")), first, second)
 
     turn_index = game.get("current_turn_index", 0) + 1
 
-    if turn_index >= len(draft_turns):
+    if turn_index >= len(turns):
         return None, "complete" 
 
-    next_captain_id, next_action_type = draft_turns[turn_index]
+    next_captain_id, next_action_type = turns[turn_index]
 
-    db.games.update_one({"_id": game["_id"]}, {"$set": {"current_turn_index": turn_index}})
+    await adb.games.update_one({"_id": game["_id"]}, {"$set": {"current_turn_index": turn_index}})
     return next_captain_id, next_action_type
 
 
-
 class DraftActionSelect(discord.ui.Select):
     def __init__(self, game_id, available, captain_id, action_type, bot, ephemeral_tracker):
         options = [discord.SelectOption(label=char) for char in available]
@@ -1399,7 +1557,7 @@ class DraftActionSelect(discord.ui.Select):
             return
 
         selected = self.values[0]
-        game = db.games.find_one({"_id": self.game_id})
+        game = await adb.games.find_one({"_id": self.game_id})
 
 
         updates = {}
@@ -1410,12 +1568,12 @@ class DraftActionSelect(discord.ui.Select):
             team_key = "team_a_picks" if interaction.user.id == game["captain_a_discord_id"] else "team_b_picks"
             updates["$addToSet"] = {team_key: selected}
             updates["$pull"] = {"hunters_available": selected}
-        db.games.update_one({"_id": self.game_id}, updates)
+        await adb.games.update_one({"_id": self.game_id}, updates)
 
 
-        game = db.games.find_one({"_id": self.game_id}) 
-        next_captain_id, next_action_type = get_next_turn_and_phase(game, self.action_type)
-        db.games.update_one(
+        game = await adb.games.find_one({"_id": self.game_id}) 
+        next_captain_id, next_action_type = await get_next_turn_and_phase(game, self.action_type)
+        await adb.games.update_one(
             {"_id": self.game_id},
             {"$set": {"current_turn_captain_id": next_captain_id, "current_action_type": next_action_type}}
         )
@@ -1449,17 +1607,16 @@ class DraftActionSelect(discord.ui.Select):
             self.ephemeral_tracker[key] = interaction
 
 
-
         thread = self.bot.get_channel(game["draft_channel_id"])
         msg = await thread.fetch_message(game["draft_action_msg_id"])
-        game = db.games.find_one({"_id": self.game_id})  
+        game = await adb.games.find_one({"_id": self.game_id})  
 
         if next_action_type == "complete":
-            db.games.update_one({"_id": self.game_id}, {"$set": {"current_draft_stage": "complete"}})
+            await adb.games.update_one({"_id": self.game_id}, {"$set": {"current_draft_stage": "complete"}})
             await asyncio.sleep(0.05)
             await update_draft_message(self.game_id, thread, self.bot)
             await msg.edit(content="Draft complete!", view=None)
-            game = db.games.find_one({"_id": self.game_id})
+            game = await adb.games.find_one({"_id": self.game_id})
         else:
 
             next_available = game["hunters_available"]
@@ -1474,7 +1631,7 @@ async def cleanup_old_draft_threads():
     now = datetime.now(timezone.utc)
     one_hour_ago = now - timedelta(hours=1)
     
-    old_games = db.games.find({
+    old_games = await adb.games.find({
         "draft_start_time": {"$lt": one_hour_ago}
     })
     
@@ -1495,7 +1652,7 @@ async def cleanup_old_draft_threads():
             try:
                 await thread.delete()
                 print(f"Deleted draft thread {thread_id}")
-                db.games.update_one({"_id": game["_id"]}, {"$set": {"thread_deleted": True}})
+                await adb.games.update_one({"_id": game["_id"]}, {"$set": {"thread_deleted": True}})
             except Exception as e:
                 print(f"[ERROR] Failed to delete thread {thread_id}: {e}")
         else:
@@ -1522,9 +1679,9 @@ async def post_access_ui_message(channel, embed=None):
     )
     last_access_ui_message = msg
 
-def get_queue_status_embed():
-    ranked_players = list(db.in_queue.find({"game_type": "ranked_arena"}).sort("queue_joined_at", pymongo.ASCENDING))
-    draft_players = list(db.in_queue.find({"game_type": "draft_arena"}).sort("queue_joined_at", pymongo.ASCENDING))
+async def get_queue_status_embed():
+    ranked_players = await adb.in_queue.find({"game_type": "ranked_arena"}, sort=[("queue_joined_at", pymongo.ASCENDING)])
+    draft_players = await adb.in_queue.find({"game_type": "draft_arena"}, sort=[("queue_joined_at", pymongo.ASCENDING)])
 
     embed = discord.Embed(title="Queue Status", color=discord.Color.blue())
 
@@ -1538,7 +1695,7 @@ def get_queue_status_embed():
             mmr = int(round(player_data.get('mmr', 1000)))
             ranked_list.append(f"{ign} - {mmr} MMR")
         ranked_desc = "\n".join(ranked_list)
-    embed.add_field(name=f"Ranked Arena Queue ({len(ranked_players)}/8)", value=ranked_desc, inline=False)
+    embed.add_field(name=f"Ranked Arena Queue ({len(ranked_players)}/{lobby_size_for('ranked_arena')})", value=ranked_desc, inline=False)
 
 
     embed.add_field(name="\u200b", value="\u200b", inline=False) 
@@ -1551,7 +1708,7 @@ def get_queue_status_embed():
             mmr = int(round(player_data.get('mmr', 1000)))
             draft_list.append(f"{ign} - {mmr} MMR")
         draft_desc = "\n".join(draft_list)
-    embed.add_field(name=f"Draft Arena Queue ({len(draft_players)}/8)", value=draft_desc, inline=False)
+    embed.add_field(name=f"Draft Arena Queue ({len(draft_players)}/{lobby_size_for('draft_arena')})", value=draft_desc, inline=False)
 
     embed.set_footer(text="Updated automatically every 30 seconds.")
     return embed
@@ -1561,50 +1718,34 @@ async def update_access_ui_embed():
     global last_access_ui_message
     if last_access_ui_message:
         try:
-            embed = get_queue_status_embed()
+            embed = await get_queue_status_embed()
             await last_access_ui_message.edit(embed=embed)
         except Exception as e:
 
             pass
 
-def is_user_in_ongoing_game(user_id):
-
-    ongoing_games = list(db.games.find({'result': {'$in': ['pending', 'team_a', 'team_b']}}))
-    for game in ongoing_games: 
-        team_a = game.get('team_a', [])
-        team_b = game.get('team_b', [])
-        ids_in_a = {str(p.get('discord_id')) for p in team_a}
-        ids_in_b = {str(p.get('discord_id')) for p in team_b}
-        if str(user_id) in ids_in_a or str(user_id) in ids_in_b:
-            return True
-    return False
-
-
 @tasks.loop(minutes=3)
 async def refresh_access_ui_message():
     channel = bot.get_channel(ALLOWED_CHANNEL_ID)
-    embed = get_queue_status_embed()
+    embed = await get_queue_status_embed()
     await post_access_ui_message(channel, embed=embed)
 
 class LeaderboardPanelView(discord.ui.View):
-    def __init__(self, data, page=0, panel_view=None):
+    def __init__(self, page=0, panel_view=None):
         super().__init__(timeout=None)
-        self.data = data
         self.page = page
         self.per_page = 10
-        self.max_page = (len(data) - 1) // self.per_page
         self.panel_view = panel_view
 
+    @property
+    def max_page(self):
+        return leaderboard.snapshot.page_count(self.per_page) - 1
+
     def get_embed(self):
-        start = self.page * self.per_page
-        end = start + self.per_page
-        entries = self.data[start:end]
-        leaderboard_text = "\n".join([
-            f"{start + i + 1}. {user.get('ign', 'N/A')} - {int(user.get('mmr', 0))} MMR"
-            for i, user in enumerate(entries)
-        ])
+        self.page = min(self.page, self.max_page)
+        header, leaderboard_text = format_leaderboard_page(self.page, self.per_page)
         embed = discord.Embed(
-            title=f"Leaderboard (Page {self.page + 1}/{self.max_page + 1}):",
+            title=f"Leaderboard {header}",
             description=leaderboard_text,
             color=discord.Color.gold()
         )
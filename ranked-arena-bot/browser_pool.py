@@ -0,0 +1,126 @@
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+from config import config
+
+
+def init_browser():
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--no-sandbox')
+    return webdriver.Chrome(options=options)
+
+
+class BrowserPool:
+    """
+    Bounded pool of headless Chrome sessions shared by every scraper call.
+    Drivers are leased out one caller at a time, health-checked before reuse
+    and recycled after `max_uses` leases or `idle_timeout` seconds unused.
+    """
+
+    def __init__(self, max_size=3, max_uses=50, idle_timeout=600, lease_timeout=300):
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.idle_timeout = idle_timeout
+        self.lease_timeout = lease_timeout
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._uses = {}
+        self._closed = False
+
+    def _is_healthy(self, driver):
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(driver, None)
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"[WARN] Failed to quit pooled browser: {e}")
+
+    def reap_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [d for d, last_used in self._idle if now - last_used > self.idle_timeout]
+            self._idle = [(d, t) for d, t in self._idle if now - t <= self.idle_timeout]
+        for driver in expired:
+            self._discard(driver)
+
+    def acquire(self):
+        if self._closed:
+            raise RuntimeError("Browser pool is closed.")
+        if not self._slots.acquire(timeout=self.lease_timeout):
+            raise TimeoutError(f"No pooled browser became available within {self.lease_timeout}s.")
+        try:
+            self.reap_idle()
+            while True:
+                with self._lock:
+                    driver = self._idle.pop()[0] if self._idle else None
+                if driver is None:
+                    driver = init_browser()
+                    with self._lock:
+                        self._uses[driver] = 0
+                    return driver
+                if self._is_healthy(driver):
+                    return driver
+                print("[WARN] Pooled browser failed health check, replacing it.")
+                self._discard(driver)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, driver, broken=False):
+        try:
+            with self._lock:
+                uses = self._uses.get(driver, 0) + 1
+                self._uses[driver] = uses
+            if broken or self._closed or uses >= self.max_uses:
+                self._discard(driver)
+                return
+            try:
+                driver.get("about:blank")
+            except Exception:
+                self._discard(driver)
+                return
+            with self._lock:
+                self._idle.append((driver, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def lease(self):
+        driver = self.acquire()
+        broken = False
+        try:
+            yield driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self.release(driver, broken=broken)
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            idle = [d for d, _ in self._idle]
+            self._idle = []
+        for driver in idle:
+            self._discard(driver)
+
+
+shared_pool = BrowserPool(
+    max_size=config.get("browser_pool_size", 3),
+    max_uses=config.get("browser_max_uses", 50),
+    idle_timeout=config.get("browser_idle_timeout", 600)
+)
+atexit.register(shared_pool.close)
@@ -2,5 +2,68 @@ config = {
     "bot_token": "", # removed for public view purposes
     "default_mmr": 1000,
     "queue_time_limit": 600,
-    "match_watching_interval": 60
+    "browser_pool_size": 3,
+    "browser_max_uses": 50,
+    "browser_idle_timeout": 600,
+    "monitor_workers": 4,
+    "monitor_players_per_team": 2,
+    "result_quorum": 2,
+    "result_max_age_minutes": {
+        "ranked_arena": 5,
+        "draft_arena": 7
+    },
+    "player_id_cache_ttl_hours": 168,
+    "player_id_cache_negative_ttl_minutes": 30,
+    "stats_base_url": "https://supervive-stats.com",
+    "stats_fetch_backends": ["http", "selenium"],
+    "stats_http_shell_retry_minutes": 60,
+    "monitor_max_wait": 1800,
+    "monitor_max_active_jobs": 8,
+    "monitor_lease_seconds": 600,
+    "monitor_check_timeout_seconds": 420,
+    "monitor_job_retention_days": 7,
+    "monitor_initial_delay": {
+        "ranked_arena": 300,
+        "draft_arena": 480
+    },
+    "poll_min_interval": 20,
+    "poll_max_interval": 120,
+    "poll_backoff": 1.5,
+    "poll_jitter": 0.2,
+    "poll_max_checks_per_minute": 30,
+    "poll_wake_cooldown": 30,
+    "result_lease_seconds": 120,
+    "trueskill": {"mu": 1000, "sigma": 300, "beta": 200, "tau": 0.05},
+    "mmr_rules": {
+        "start_sigma": 300,
+        "min_sigma": 100,
+        "sigma_step": 3,
+        "decay_rate": 0.02,
+        "decay_floor": 0.3,
+        "min_delta": 20,
+        "min_delta_jitter": 5,
+        "max_delta": 70
+    },
+    "replay_collection": "users_replay",
+    "mmr_ledger_retention_days": 180,
+    "history_page_size": 10,
+    "team_sizes": {"ranked_arena": 4, "draft_arena": 4},
+    "matchmaking": {
+        "max_wait_seconds": 300,
+        "base_spread": 400,
+        "spread_growth_per_minute": 100,
+        "spread_weight": 1.0,
+        "balance_weight": 2.0,
+        "wait_weight": 10.0
+    },
+    "matchmaking_debounce_seconds": 0.25,
+    "matchmaking_sweep_seconds": 30,
+    "db_workers": 8,
+    "db_slow_call_seconds": 0.5,
+    "mongo_max_pool_size": 50,
+    "player_index_rebuild_minutes": 5,
+    "profile_cache_size": 2000,
+    "profile_cache_ttl_seconds": 300,
+    "leaderboard_reload_minutes": 60,
+    "queue_timeout_minutes": 60
 }
\ No newline at end of file
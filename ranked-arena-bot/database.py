@@ -0,0 +1,50 @@
+import threading
+from pymongo import MongoClient
+from config import config
+
+MONGO_URI = "" # removed for public view purposes
+DATABASE_NAME = "Ranked-Arena-Database"
+
+_client = None
+_settings = {"uri": MONGO_URI, "name": DATABASE_NAME, "options": {}}
+_lock = threading.Lock()
+
+
+def configure(uri, name=DATABASE_NAME, **options):
+    """Point the shared client somewhere else (benchmarks, scripts). Call before first use."""
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+        _settings.update(uri=uri, name=name, options=options)
+
+
+def get_client():
+    """The one MongoClient of this process, created on first use."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                options = {"maxPoolSize": config.get("mongo_max_pool_size", 50), "tz_aware": True, **_settings["options"]}
+                _client = MongoClient(_settings["uri"], **options)
+    return _client
+
+
+def get_db():
+    return get_client()[_settings["name"]]
+
+
+class _LazyDatabase:
+    """Module-level `db` that resolves the shared client only when a collection is used."""
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(get_db(), name)
+
+    def __getitem__(self, name):
+        return get_db()[name]
+
+
+db = _LazyDatabase()
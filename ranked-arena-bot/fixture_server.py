@@ -0,0 +1,47 @@
+import argparse
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Serves saved supervive-stats pages from fixtures/players so the HTTP fetch
+# backend can be exercised offline. Point config["stats_base_url"] at it:
+#   python fixture_server.py --port 8765
+#   "stats_base_url": "http://127.0.0.1:8765"
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "players")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if not path.startswith("/players/"):
+            self.send_error(404)
+            return
+        user_id = os.path.basename(path[len("/players/"):])
+        file_path = os.path.join(FIXTURE_DIR, f"{user_id}.html")
+        if not os.path.isfile(file_path):
+            self.send_error(404)
+            return
+        with open(file_path, "rb") as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(host="127.0.0.1", port=8765):
+    server = ThreadingHTTPServer((host, port), FixtureHandler)
+    print(f"[INFO] Serving fixtures from {FIXTURE_DIR} on http://{host}:{port}")
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve saved supervive-stats player pages for offline testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    try:
+        serve(args.host, args.port).serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,149 @@
+import threading
+from bisect import bisect_left
+from collections import ChainMap
+from database import db
+
+# Overlays stacked on a snapshot's id -> MMR map before they are merged into one dict.
+MAX_OVERLAYS = 16
+
+
+def _key(discord_id, mmr):
+    return (-mmr, str(discord_id))
+
+
+class LeaderboardSnapshot:
+    """
+    Players sorted by MMR, highest first. Never modified once built:
+    updates produce a new snapshot, so every open view can read the current
+    one without copying it.
+
+    Rows are (-mmr, str(discord_id), discord_id, ign), so the row list is
+    its own bisection key. with_changes costs one list copy plus a remove
+    and an insert per changed player; the id -> MMR map is shared with the
+    previous snapshot through a small overlay instead of being copied.
+    """
+
+    def __init__(self, rows=()):
+        self._rows = sorted(_key(discord_id, mmr) + (discord_id, ign) for discord_id, ign, mmr in rows)
+        self._mmrs = ChainMap({row[2]: -row[0] for row in self._rows})
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _listing(self, start, stop):
+        return [(start + i + 1, row[3], -row[0]) for i, row in enumerate(self._rows[start:stop])]
+
+    def page_count(self, per_page):
+        return max(1, -(-len(self._rows) // per_page))
+
+    def page(self, page, per_page):
+        """Rows of one page as (rank, ign, mmr), ranks starting at 1."""
+        start = page * per_page
+        return self._listing(start, start + per_page)
+
+    def rank_of(self, discord_id):
+        """1-based rank by bisection on the sorted rows, or None if the player is not ranked."""
+        mmr = self._mmrs.get(discord_id)
+        if mmr is None:
+            return None
+        return bisect_left(self._rows, _key(discord_id, mmr)) + 1
+
+    def percentile(self, discord_id):
+        """Percent of ranked players below this one (the best of 200 players is at 99.5)."""
+        rank = self.rank_of(discord_id)
+        if rank is None:
+            return None
+        return 100.0 * (len(self._rows) - rank) / len(self._rows)
+
+    def around(self, discord_id, radius=5):
+        """Up to `radius` players either side of this one as (rank, ign, mmr), the player included."""
+        rank = self.rank_of(discord_id)
+        if rank is None:
+            return []
+        start = max(0, rank - 1 - radius)
+        return self._listing(start, rank + radius)
+
+    def with_changes(self, changes):
+        """A new snapshot with each {'discord_id', 'mmr', 'ign'?} change applied."""
+        rows, overlay = list(self._rows), {}
+        mmrs = self._mmrs.new_child(overlay)
+        for change in changes:
+            discord_id = change['discord_id']
+            ign = change.get('ign')
+            current = mmrs.get(discord_id)
+            mmr = change.get('mmr', current)
+            if current is not None:
+                i = bisect_left(rows, _key(discord_id, current))
+                ign = ign or rows[i][3]
+                del rows[i]
+            if mmr is None:
+                if current is not None:
+                    overlay[discord_id] = None
+                continue
+            key = _key(discord_id, mmr)
+            rows.insert(bisect_left(rows, key), key + (discord_id, ign or 'N/A'))
+            overlay[discord_id] = mmr
+        if len(mmrs.maps) > MAX_OVERLAYS:
+            mmrs = ChainMap({discord_id: mmr for discord_id, mmr in mmrs.items() if mmr is not None})
+        snapshot = LeaderboardSnapshot()
+        snapshot._rows, snapshot._mmrs = rows, mmrs
+        return snapshot
+
+
+def load_rows():
+    return [
+        (user['discord_id'], user.get('ign', 'N/A'), user.get('mmr', 1000))
+        for user in db.users.find({}, {'_id': 0, 'discord_id': 1, 'ign': 1, 'mmr': 1})
+    ]
+
+
+class Leaderboard:
+    """
+    Holds the current snapshot. MMR writes apply their changes in place of
+    a reload; a full load from Mongo replays changes that landed meanwhile.
+    Game results are deferred and published together by flush(), so a tick
+    that rates several games builds one new snapshot instead of one each.
+    """
+
+    def __init__(self):
+        self.snapshot = LeaderboardSnapshot()
+        self.loaded = False
+        self._pending = None
+        self._deferred = []
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            self._pending = []
+        try:
+            snapshot = LeaderboardSnapshot(load_rows())
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self.snapshot = snapshot.with_changes(pending) if pending else snapshot
+            self.loaded = True
+        print(f"[INFO] Leaderboard loaded with {len(self.snapshot)} players.")
+
+    def apply(self, changes, defer=False):
+        changes = list(changes)
+        if not changes:
+            return
+        with self._lock:
+            if defer:
+                self._deferred.extend(changes)
+                return
+            if self._pending is not None:
+                self._pending.extend(changes)
+            self.snapshot = self.snapshot.with_changes(changes)
+
+    def flush(self):
+        """Publish the deferred changes in one snapshot."""
+        with self._lock:
+            changes, self._deferred = self._deferred, []
+        self.apply(changes)
+
+
+leaderboard = Leaderboard()
@@ -0,0 +1,252 @@
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from html.parser import HTMLParser
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "source", "track", "wbr", "path", "circle", "rect"
+}
+HISTORY_CLASSES = {"flex", "flex-col", "gap-2"}
+STAMP_CLASSES = {"flex", "gap-1", "text-muted-foreground", "text-sm"}
+KNOWN_MODES = ("Custom", "Squads", "Duos", "Solos", "Arena", "Ranked")
+PLACEMENT_RE = re.compile(r"^(\d+)(st|nd|rd|th)$")
+RELATIVE_RE = re.compile(r"^(\d+|an?|a few)\s+(second|minute|hour|day|week|month|year)s?\s+ago$", re.IGNORECASE)
+UNIT_SECONDS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+    "week": 7 * 86400,
+    "month": 30 * 86400,
+    "year": 365 * 86400
+}
+
+
+@dataclass
+class MatchCard:
+    text: str
+    cleaned_text: str
+    timestamp_text: str
+    mode: str = None
+    placement: int = None
+    players: list = field(default_factory=list)
+    played_at: datetime = None
+
+    @property
+    def is_custom(self):
+        return self.mode == "Custom"
+
+    def age_minutes(self, now=None):
+        if self.played_at is None:
+            return None
+        now = now or datetime.now(timezone.utc)
+        return max(0.0, (now - self.played_at).total_seconds() / 60)
+
+
+def parse_relative_time(text, now=None):
+    """
+    Turn a relative stamp such as "3 minutes ago", "an hour ago" or
+    "Yesterday" into an absolute UTC estimate. Returns None if unknown.
+    """
+    now = now or datetime.now(timezone.utc)
+    text = (text or "").strip()
+    lowered = text.lower()
+    if not lowered:
+        return None
+    if lowered in ("just now", "now", "a moment ago") or lowered.startswith("less than"):
+        return now
+    if lowered == "yesterday":
+        return now - timedelta(days=1)
+    match = RELATIVE_RE.match(text)
+    if not match:
+        return None
+    amount, unit = match.group(1).lower(), match.group(2).lower()
+    if amount in ("a", "an"):
+        count = 1
+    elif amount == "a few":
+        count = 3
+    else:
+        count = int(amount)
+    return now - timedelta(seconds=count * UNIT_SECONDS[unit])
+
+
+class _HistoryCandidate:
+    """Cards collected under one div that carries the match-history classes."""
+
+    def __init__(self, depth):
+        self.depth = depth
+        self.cards = []
+        self.card = None
+        self.stamp_depth = None
+        self.span_depth = None
+        self.span_text = []
+        self.link_depth = None
+
+    def start(self, tag, classes, attrs, depth):
+        if tag == "div" and depth == self.depth + 1:
+            self.card = {"chunks": [], "stamp_chunks": [], "stamp_seen": False, "players": []}
+            self.cards.append(self.card)
+        elif self.card is not None:
+            if tag == "div" and self.stamp_depth is None and not self.card["stamp_seen"] and STAMP_CLASSES <= classes:
+                self.stamp_depth = depth
+            elif tag == "span" and self.stamp_depth is not None and self.span_depth is None:
+                self.span_depth = depth
+                self.span_text = []
+            elif tag == "a" and self.link_depth is None and "/players/" in (dict(attrs).get("href") or ""):
+                self.link_depth = depth
+                self.card["players"].append("")
+
+    def close(self, depth):
+        if depth == self.link_depth:
+            self.link_depth = None
+        if depth == self.span_depth:
+            self.card["stamp_chunks"].append(" ".join(self.span_text))
+            self.span_depth = None
+        elif depth == self.stamp_depth:
+            self.stamp_depth = None
+            self.card["stamp_seen"] = True
+        elif depth == self.depth + 1:
+            self.card = None
+
+    def data(self, text):
+        if self.card is None:
+            return
+        if self.link_depth is not None:
+            self.card["players"][-1] = f"{self.card['players'][-1]} {text}".strip()
+        if self.span_depth is not None:
+            self.span_text.append(text)
+            self.card["chunks"].append(("stamp", len(self.card["stamp_chunks"]), text))
+        else:
+            self.card["chunks"].append(("text", None, text))
+
+    def is_match_history(self):
+        """True if some card has both a placement and a timestamp stamp."""
+        return any(
+            card["stamp_seen"] and any(PLACEMENT_RE.match(chunk) for kind, _, chunk in card["chunks"] if kind == "text")
+            for card in self.cards
+        )
+
+
+class MatchCardExtractor(HTMLParser):
+    """
+    Reads a supervive-stats player page in one pass and collects the text of
+    every match card in the match history list, mirroring what the Selenium
+    path used to read with find_elements.
+
+    The history list is found by its structure rather than its position:
+    every div with the history classes collects its children as cards, and
+    the first one to close holding a card with a placement and a stamp wins.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []
+        self.candidates = []
+        self.containers = 0
+        self.cards = []
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done or tag in VOID_TAGS:
+            return
+        classes = set()
+        for name, value in attrs:
+            if name == "class" and value:
+                classes = set(value.split())
+        depth = len(self.stack)
+        self.stack.append(tag)
+
+        for candidate in self.candidates:
+            candidate.start(tag, classes, attrs, depth)
+        if tag == "div" and HISTORY_CLASSES <= classes:
+            self.containers += 1
+            self.candidates.append(_HistoryCandidate(depth))
+
+    def handle_startendtag(self, tag, attrs):
+        pass
+
+    def handle_endtag(self, tag):
+        if self.done or tag in VOID_TAGS or tag not in self.stack:
+            return
+        while self.stack:
+            depth = len(self.stack) - 1
+            closed = self.stack.pop()
+            self._close(depth)
+            if self.done or closed == tag:
+                break
+
+    def _close(self, depth):
+        if not self.candidates:
+            return
+        if depth == self.candidates[-1].depth:
+            candidate = self.candidates.pop()
+            if candidate.is_match_history():
+                self.cards = candidate.cards
+                self.candidates = []
+                self.done = True
+            return
+        for candidate in self.candidates:
+            candidate.close(depth)
+
+    def handle_data(self, data):
+        if not self.candidates:
+            return
+        text = data.strip()
+        if not text:
+            return
+        for candidate in self.candidates:
+            candidate.data(text)
+
+
+def is_app_shell(html):
+    """
+    True for a page without any history-class container, i.e. the
+    client-rendered shell the site serves before its scripts have run.
+    """
+    parser = MatchCardExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.containers == 0
+
+
+def extract_match_cards(html, now=None):
+    """
+    Parse the match history of a player page into MatchCard records in page
+    order, newest first. cleaned_text is the card text without the
+    timestamp, which is what the block hash is computed from.
+    """
+    parser = MatchCardExtractor()
+    parser.feed(html)
+    parser.close()
+    now = now or datetime.now(timezone.utc)
+
+    cards = []
+    for card in parser.cards:
+        stamps = card["stamp_chunks"]
+        last_stamp = len(stamps) - 1
+        chunks = [chunk for _, _, chunk in card["chunks"]]
+        cleaned = "\n".join(
+            chunk for kind, index, chunk in card["chunks"]
+            if not (kind == "stamp" and index == last_stamp)
+        )
+        timestamp = stamps[-1].strip() if stamps else ""
+
+        mode = next((chunk for chunk in chunks if chunk in KNOWN_MODES), None)
+        placement = None
+        for chunk in chunks:
+            match = PLACEMENT_RE.match(chunk)
+            if match:
+                placement = int(match.group(1))
+                break
+
+        cards.append(MatchCard(
+            text="\n".join(chunks),
+            cleaned_text=cleaned,
+            timestamp_text=timestamp,
+            mode=mode,
+            placement=placement,
+            players=[p for p in card["players"] if p],
+            played_at=parse_relative_time(timestamp, now)
+        ))
+    return cards
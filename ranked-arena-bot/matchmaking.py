@@ -0,0 +1,200 @@
+import heapq
+import math
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from config import config
+
+DEFAULT_SETTINGS = {
+    "team_size": 4,
+    "max_wait_seconds": 300,
+    "base_spread": 400,
+    "spread_growth_per_minute": 100,
+    "spread_weight": 1.0,
+    "balance_weight": 2.0,
+    "wait_weight": 10.0
+}
+SETTINGS = {**DEFAULT_SETTINGS, **config.get("matchmaking", {})}
+TEAM_SIZES = config.get("team_sizes", {"ranked_arena": 4, "draft_arena": 4})
+
+
+def team_size_for(game_type):
+    return TEAM_SIZES.get(game_type, SETTINGS["team_size"])
+
+
+def lobby_size_for(game_type):
+    return team_size_for(game_type) * 2
+
+
+def settings_for(game_type):
+    return {**SETTINGS, "team_size": team_size_for(game_type)}
+
+
+def votes_needed(player_count):
+    """Players needed to cancel a game by vote: three quarters, rounded up."""
+    return math.ceil(player_count * 0.75)
+
+
+def draft_turns(team_size, first, second):
+    """
+    Draft order for a lobby: one ban each, then picks in Thue-Morse order
+    (first, second, second, first, second, first, first, second, ...),
+    which keeps the pick advantage balanced for any team size.
+    """
+    turns = [(first, "ban"), (second, "ban")]
+    for i in range(team_size * 2):
+        turns.append((second if bin(i).count("1") % 2 else first, "pick"))
+    return turns
+
+
+@dataclass
+class Lobby:
+    players: list
+    team_a: list
+    team_b: list
+    smallest_diff: float
+    spread: float
+    score: float = field(default=0.0)
+
+
+def joined_at(player):
+    """queue_joined_at as an aware datetime (stored as a UTC date, see normalize_queue_timestamps)."""
+    value = player.get('queue_joined_at')
+    if value is None:
+        return datetime.min.replace(tzinfo=timezone.utc)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def player_mmr(player):
+    return int(player.get('mmr', 1000))
+
+
+def _subset_sums(indexes, mmrs):
+    """Every subset of indexes as (sum, members), grouped by size and sorted by sum."""
+    subsets = [(0, ())]
+    for i in indexes:
+        subsets += [(total + mmrs[i], members + (i,)) for total, members in subsets]
+    by_size = {}
+    for total, members in subsets:
+        by_size.setdefault(len(members), []).append((total, members))
+    for group in by_size.values():
+        group.sort()
+    return by_size
+
+
+def best_split(mmrs, team_size):
+    """
+    Exact best split of a lobby into two teams of team_size by MMR sum,
+    found meet-in-the-middle: the first player is pinned to team A, the
+    rest is halved, and each subset of one half is matched by bisection
+    with the subset of the other half that brings team A closest to even.
+    """
+    total = sum(mmrs)
+    rest = list(range(1, len(mmrs)))
+    left = _subset_sums(rest[:len(rest) // 2], mmrs)
+    right = _subset_sums(rest[len(rest) // 2:], mmrs)
+    need = team_size - 1
+
+    best, smallest_diff = None, float('inf')
+    for size, subsets in left.items():
+        others = right.get(need - size)
+        if not others:
+            continue
+        other_sums = [total_r for total_r, _ in others]
+        for total_l, members in subsets:
+            goal = total / 2 - mmrs[0] - total_l
+            j = bisect_left(other_sums, goal)
+            for k in (j - 1, j):
+                if 0 <= k < len(others):
+                    diff = abs(2 * (mmrs[0] + total_l + other_sums[k]) - total)
+                    if diff < smallest_diff:
+                        smallest_diff = diff
+                        best = (0,) + members + others[k][1]
+        if smallest_diff == 0:
+            break
+
+    team_a_idxs = sorted(best)
+    team_b_idxs = [i for i in range(len(mmrs)) if i not in best]
+    return team_a_idxs, team_b_idxs, smallest_diff
+
+
+def find_lobby(players, now=None, settings=None):
+    """
+    Pick the best lobby from the whole queue, or None if no lobby is good
+    enough yet. Candidates are runs of consecutive players in MMR order,
+    scored by MMR spread, team balance and how long their players waited.
+    A run's spread and wait are known up front, so runs are tried best
+    bound first and the split search stops once no run can win.
+    Anyone waiting past max_wait_seconds is placed in the next lobby.
+    """
+    settings = settings or SETTINGS
+    now = now or datetime.now(timezone.utc)
+    size = settings["team_size"] * 2
+    if len(players) < size:
+        return None
+
+    ranked = sorted(players, key=lambda p: (player_mmr(p), joined_at(p)))
+    mmrs = [player_mmr(p) for p in ranked]
+    waits = [max(0.0, (now - joined_at(p)).total_seconds()) for p in ranked]
+
+    wait_prefix = [0.0]
+    for wait in waits:
+        wait_prefix.append(wait_prefix[-1] + wait)
+
+    starts = range(len(ranked) - size + 1)
+    oldest = max(range(len(ranked)), key=lambda i: waits[i])
+    forced = waits[oldest] >= settings["max_wait_seconds"]
+    if forced:
+        starts = range(max(0, oldest - size + 1), min(oldest, len(ranked) - size) + 1)
+
+    candidates = []
+    for start in starts:
+        end = start + size
+        spread = mmrs[end - 1] - mmrs[start]
+        longest_wait = max(waits[start:end])
+        if not forced:
+            allowed = settings["base_spread"] + settings["spread_growth_per_minute"] * longest_wait / 60
+            if spread > allowed:
+                continue
+        mean_wait_minutes = (wait_prefix[end] - wait_prefix[start]) / size / 60
+        bound = settings["spread_weight"] * spread - settings["wait_weight"] * mean_wait_minutes
+        candidates.append((bound, start, spread))
+    heapq.heapify(candidates)
+
+    best = None
+    while candidates:
+        bound, start, spread = heapq.heappop(candidates)
+        if best and bound >= best.score:
+            break
+        window = ranked[start:start + size]
+        team_a_idxs, team_b_idxs, diff = best_split(mmrs[start:start + size], settings["team_size"])
+        score = bound + settings["balance_weight"] * diff
+        if best is None or score < best.score:
+            best = Lobby(
+                players=window,
+                team_a=[window[i] for i in team_a_idxs],
+                team_b=[window[i] for i in team_b_idxs],
+                smallest_diff=diff,
+                spread=spread,
+                score=score
+            )
+    return best
+
+
+def form_lobbies(players, now=None, settings=None):
+    """
+    Split the queue into disjoint lobbies in one pass: take the best lobby,
+    drop its players and repeat until no acceptable lobby is left.
+    """
+    now = now or datetime.now(timezone.utc)
+    remaining = list(players)
+    lobbies = []
+    while True:
+        lobby = find_lobby(remaining, now, settings)
+        if lobby is None:
+            return lobbies
+        lobbies.append(lobby)
+        taken = {id(p) for p in lobby.players}
+        remaining = [p for p in remaining if id(p) not in taken]
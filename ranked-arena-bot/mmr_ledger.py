@@ -0,0 +1,135 @@
+from datetime import datetime, timezone, timedelta
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from database import db
+from config import config
+
+
+RETENTION = timedelta(days=config.get("mmr_ledger_retention_days", 180))
+
+
+def ensure_ledger_indexes():
+    db.mmr_events.create_index([("discord_id", ASCENDING), ("at", DESCENDING), ("_id", DESCENDING)])
+    db.mmr_events.create_index([("game_id", ASCENDING), ("discord_id", ASCENDING)], unique=True)
+    db.mmr_events.create_index("at")
+    db.mmr_events.create_index("rollup_run", sparse=True)
+    db.mmr_rollups.create_index([("discord_id", ASCENDING), ("month", DESCENDING)])
+
+
+def ledger_event(discord_id, game_id, at, change, outcome):
+    """One mmr_events row for a player's rating change in a game."""
+    return {
+        'discord_id': discord_id,
+        'game_id': game_id,
+        'at': at,
+        'result': outcome,
+        'mu_before': change['new_mmr'] - change['delta'],
+        'mu_after': change['new_mmr'],
+        'sigma_before': change['previous_sigma'],
+        'sigma_after': change['new_sigma'],
+        'delta': change['delta']
+    }
+
+
+def get_history(discord_id, limit=10, before=None):
+    """
+    Newest-first page of a player's MMR events. `before` is the cursor
+    returned with the previous page; None is returned once nothing is left.
+    """
+    query = {'discord_id': discord_id}
+    if before:
+        at, event_id = before
+        query['$or'] = [{'at': {'$lt': at}}, {'at': at, '_id': {'$lt': event_id}}]
+
+    events = list(
+        db.mmr_events.find(query, {'discord_id': 0})
+        .sort([('at', DESCENDING), ('_id', DESCENDING)])
+        .limit(limit + 1)
+    )
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = (events[-1]['at'], events[-1]['_id'])
+    return events, next_cursor
+
+
+def get_rollups(discord_id, limit=12):
+    return list(db.mmr_rollups.find({'discord_id': discord_id}).sort('month', DESCENDING).limit(limit))
+
+
+def _rollup_run(run):
+    """Merge the events tagged with `run` into mmr_rollups; a run already merged into a row is skipped."""
+    db.mmr_events.aggregate([
+        {'$match': {'rollup_run': run}},
+        {'$sort': {'at': ASCENDING, '_id': ASCENDING}},
+        {'$group': {
+            '_id': {'discord_id': '$discord_id', 'month': {'$dateToString': {'format': '%Y-%m', 'date': '$at'}}},
+            'games': {'$sum': 1},
+            'wins': {'$sum': {'$cond': [{'$eq': ['$result', 'win']}, 1, 0]}},
+            'losses': {'$sum': {'$cond': [{'$eq': ['$result', 'lose']}, 1, 0]}},
+            'delta_total': {'$sum': '$delta'},
+            'mu_start': {'$first': '$mu_before'},
+            'mu_end': {'$last': '$mu_after'},
+            'mu_min': {'$min': '$mu_after'},
+            'mu_max': {'$max': '$mu_after'},
+            'sigma_end': {'$last': '$sigma_after'},
+            'first_at': {'$first': '$at'},
+            'last_at': {'$last': '$at'}
+        }},
+        {'$project': {
+            '_id': {'$concat': [{'$toString': '$_id.discord_id'}, ':', '$_id.month']},
+            'discord_id': '$_id.discord_id',
+            'month': '$_id.month',
+            'games': 1, 'wins': 1, 'losses': 1, 'delta_total': 1,
+            'mu_start': 1, 'mu_end': 1, 'mu_min': 1, 'mu_max': 1,
+            'sigma_end': 1, 'first_at': 1, 'last_at': 1,
+            'runs': {'$literal': [run]}
+        }},
+        {'$merge': {
+            'into': 'mmr_rollups',
+            'on': '_id',
+            'whenMatched': [{'$replaceWith': {'$cond': [
+                {'$in': [run, {'$ifNull': ['$runs', []]}]},
+                '$$ROOT',
+                {'$mergeObjects': ['$$ROOT', {
+                    'games': {'$add': ['$games', '$$new.games']},
+                    'wins': {'$add': ['$wins', '$$new.wins']},
+                    'losses': {'$add': ['$losses', '$$new.losses']},
+                    'delta_total': {'$add': ['$delta_total', '$$new.delta_total']},
+                    'mu_min': {'$min': ['$mu_min', '$$new.mu_min']},
+                    'mu_max': {'$max': ['$mu_max', '$$new.mu_max']},
+                    'mu_end': '$$new.mu_end',
+                    'sigma_end': '$$new.sigma_end',
+                    'last_at': '$$new.last_at',
+                    'runs': {'$concatArrays': [{'$ifNull': ['$runs', []]}, '$$new.runs']}
+                }]}
+            ]}}],
+            'whenNotMatched': 'insert'
+        }}
+    ])
+    return db.mmr_events.delete_many({'rollup_run': run}).deleted_count
+
+
+def rollup_ledger(now=None):
+    """
+    Fold events older than the retention window into one row per player per
+    month in mmr_rollups, then delete them. A month that already has a
+    rollup row is added to rather than replaced.
+
+    Events are tagged with a run id before they are merged and each rollup
+    row records the runs merged into it, so a run interrupted between the
+    merge and the delete is finished by the next call without counting
+    its events twice.
+    """
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - RETENTION
+    db.mmr_events.update_many(
+        {'at': {'$lt': cutoff}, 'rollup_run': {'$exists': False}},
+        {'$set': {'rollup_run': ObjectId()}}
+    )
+    deleted = 0
+    for run in db.mmr_events.distinct('rollup_run', {'rollup_run': {'$exists': True}}):
+        deleted += _rollup_run(run)
+    if deleted:
+        print(f"[INFO] Rolled up {deleted} MMR events older than {cutoff:%Y-%m-%d}.")
+    return deleted
@@ -1,39 +1,39 @@
 import trueskill
-from pymongo import MongoClient
+from pymongo import UpdateOne
+from database import db, get_client
+from pymongo.errors import OperationFailure
 import random
 import datetime
+from config import config
+from mmr_ledger import ledger_event
+from profile_cache import profile_cache
+from leaderboard import leaderboard
 
 
-env = trueskill.TrueSkill(mu=1000, sigma=300, beta=200, tau=0.05, draw_probability=0.0)
+TRUESKILL_PARAMS = config.get("trueskill", {"mu": 1000, "sigma": 300, "beta": 200, "tau": 0.05})
+MMR_RULES = config.get("mmr_rules", {
+    "start_sigma": 300, "min_sigma": 100, "sigma_step": 3,
+    "decay_rate": 0.02, "decay_floor": 0.3,
+    "min_delta": 20, "min_delta_jitter": 5, "max_delta": 70
+})
 
+env = trueskill.TrueSkill(draw_probability=0.0, **TRUESKILL_PARAMS)
 
-MONGO_URI = "" # removed for public view purposes
-client = MongoClient(MONGO_URI)
-db = client["Ranked-Arena-Database"]
 
-def update_player_mmr(player_id, new_mu, new_sigma, result):
+transactions_supported = True
+
+def compute_mmr_update(user_doc, new_mu, new_sigma, result, rng=random, rules=None):
     """
-    Update player MMR and stats in MongoDB, with progressive MMR decay and sigma clamping.
+    Apply the progressive MMR decay, minimum/maximum delta and sigma clamping
+    to a TrueSkill rating and return the resulting change for one player.
     """
-    try:
-        query_id = int(player_id)
-    except ValueError:
-        print(f"Warning: Could not convert player_id {player_id} to int for query.")
-        return False
-
-    user_doc = db.users.find_one({'discord_id': query_id})
-
-    if not user_doc:
-        print(f"⚠️ Player with ID {player_id} does not exist!")
-        return False
-
-    data = user_doc
-    current_mmr = data.get('mmr', 1000)
-    previous_sigma = data.get('confidence', 300)
-    games_played = data.get('games_played', 0)
+    rules = rules or MMR_RULES
+    current_mmr = user_doc.get('mmr', 1000)
+    previous_sigma = user_doc.get('confidence', 300)
+    games_played = user_doc.get('games_played', 0)
 
 
-    manual_sigma = max(100, 300 - games_played * 3)
+    manual_sigma = max(rules["min_sigma"], rules["start_sigma"] - games_played * rules["sigma_step"])
     if new_sigma < previous_sigma:
         new_sigma = max(manual_sigma, new_sigma)
     else:
@@ -41,75 +41,182 @@ def update_player_mmr(player_id, new_mu, new_sigma, result):
 
 
     raw_delta = new_mu - current_mmr
-    decay_factor = max(0.3, 1 - (games_played * 0.02))
+    decay_factor = max(rules["decay_floor"], 1 - (games_played * rules["decay_rate"]))
     adjusted_delta = raw_delta * decay_factor
 
-    if abs(adjusted_delta) < 20:
-        adjusted_delta = 20 + random.uniform(0, 5)
+    if abs(adjusted_delta) < rules["min_delta"]:
+        adjusted_delta = rules["min_delta"] + rng.uniform(0, rules["min_delta_jitter"])
         adjusted_delta = adjusted_delta if result == 'win' else -adjusted_delta
 
-    adjusted_delta = max(-70, min(70, adjusted_delta))
+    adjusted_delta = max(-rules["max_delta"], min(rules["max_delta"], adjusted_delta))
 
     new_mmr = current_mmr + adjusted_delta
 
-    update_data = {
-        'mmr': new_mmr,
-        'confidence': new_sigma,
-        'games_played': games_played + 1
-    }
-
+    increments = {'games_played': 1}
     if result == 'win':
-        update_data['wins'] = data.get('wins', 0) + 1
+        increments['wins'] = 1
     elif result == 'lose':
-        update_data['losses'] = data.get('losses', 0) + 1
-
-    db.users.update_one({'discord_id': query_id}, {'$set': update_data})
+        increments['losses'] = 1
 
-    print(f"✅ Player {player_id}: ΔMMR = {adjusted_delta:.1f}, New MMR = {new_mmr:.1f}, σ = {new_sigma:.2f} (↓ {previous_sigma - new_sigma:.2f})")
     return {
-        "discord_id": player_id,
-        "delta": adjusted_delta,
-        "new_mmr": new_mmr
+        'delta': adjusted_delta,
+        'new_mmr': new_mmr,
+        'new_sigma': new_sigma,
+        'previous_sigma': previous_sigma,
+        'set': {'mmr': new_mmr, 'confidence': new_sigma},
+        'inc': increments
     }
 
-def adjust_mmr_for_game(team_a, team_b, result):
-    mmr_changes = [] 
-
-    def fetch_user_rating(discord_id):
-        try:
-            query_id = int(discord_id)
-        except ValueError:
-            print(f"Warning: Could not convert discord_id {discord_id} to int for query.")
-            return env.create_rating(mu=1000, sigma=300)
-
-        user_doc = db.users.find_one({'discord_id': query_id})
-        if not user_doc:
-            print(f"⚠️ User {discord_id} not found in DB!")
-            return env.create_rating(mu=1000, sigma=300)
-        mu = user_doc.get('mmr', 1000)
-        sigma = user_doc.get('confidence', 300)
-        return env.create_rating(mu=mu, sigma=sigma)
-
-    team_a_ratings = [fetch_user_rating(p['discord_id']) for p in team_a]
-    team_b_ratings = [fetch_user_rating(p['discord_id']) for p in team_b]
-
-    if result == "team_a":
-        team_a_result, team_b_result = env.rate([team_a_ratings, team_b_ratings], ranks=[0, 1])
-    else:
-        team_a_result, team_b_result = env.rate([team_a_ratings, team_b_ratings], ranks=[1, 0])
-
-    for player, new_rating in zip(team_a, team_a_result):
-        update = update_player_mmr(player['discord_id'], new_rating.mu, new_rating.sigma, 'win' if result == "team_a" else 'lose')
-        if update:
-            update["ign"] = player["ign"]
-            mmr_changes.append(update)
+def change_from_event(event):
+    """Rebuild a compute_mmr_update result from the mmr_events row it produced."""
+    increments = {'games_played': 1, 'wins' if event['result'] == 'win' else 'losses': 1}
+    return {
+        'delta': event['delta'],
+        'new_mmr': event['mu_after'],
+        'new_sigma': event['sigma_after'],
+        'previous_sigma': event['sigma_before'],
+        'set': {'mmr': event['mu_after'], 'confidence': event['sigma_after']},
+        'inc': increments
+    }
 
-    for player, new_rating in zip(team_b, team_b_result):
-        update = update_player_mmr(player['discord_id'], new_rating.mu, new_rating.sigma, 'win' if result == "team_b" else 'lose')
-        if update:
-            update["ign"] = player["ign"]
-            mmr_changes.append(update)
+def query_discord_id(discord_id):
+    try:
+        return int(discord_id)
+    except (TypeError, ValueError):
+        print(f"Warning: Could not convert discord_id {discord_id} to int for query.")
+        return None
 
+def run_in_transaction(callback):
+    """
+    Run callback(session) inside a transaction so a game's writes land
+    together. Falls back to a plain session on servers without
+    transaction support (standalone mongod).
+    """
+    global transactions_supported
+    with get_client().start_session() as session:
+        if transactions_supported:
+            try:
+                return session.with_transaction(callback)
+            except OperationFailure as e:
+                if e.code != 20:
+                    raise
+                transactions_supported = False
+                print("[WARN] MongoDB transactions are not available, applying MMR updates without one.")
+        return callback(session)
+
+def adjust_mmr_for_game(team_a, team_b, result, game_id=None):
+    """
+    Rate a finished game and write every player's change in one transaction.
+    With a game_id the game is marked mmr_applied in the same transaction,
+    so a second call for that game changes nothing and returns None.
+    Without transactions the game is marked only after the player writes,
+    and a retry after a partial failure finishes the job: ledger rows are
+    written first, players already carrying this game's last_game_id are
+    rated from their ledger row and not written again.
+    """
+    players = [(p, 'team_a') for p in team_a] + [(p, 'team_b') for p in team_b]
+    query_ids = [query_discord_id(p['discord_id']) for p, _ in players]
+
+    def apply(session):
+        in_transaction = session.in_transaction
+        if game_id is not None:
+            if in_transaction:
+                claimed = db.games.update_one(
+                    {'_id': game_id, 'mmr_applied': {'$ne': True}},
+                    {'$set': {'mmr_applied': True, 'mmr_result': result}},
+                    session=session
+                ).modified_count
+            else:
+                claimed = not db.games.count_documents({'_id': game_id, 'mmr_applied': True}, limit=1, session=session)
+            if not claimed:
+                print(f"[INFO] MMR for {game_id} was already applied, skipping.")
+                return None
+
+        user_docs = {
+            doc['discord_id']: doc
+            for doc in db.users.find(
+                {'discord_id': {'$in': [q for q in query_ids if q is not None]}},
+                {'discord_id': 1, 'mmr': 1, 'confidence': 1, 'games_played': 1, 'last_game_id': 1},
+                session=session
+            )
+        }
+
+        recorded = {}
+        if game_id is not None and not in_transaction:
+            recorded = {
+                event['discord_id']: event
+                for event in db.mmr_events.find({'game_id': game_id}, session=session)
+            }
+            for query_id, event in recorded.items():
+                user_doc = user_docs.get(query_id)
+                if user_doc and user_doc.get('last_game_id') == game_id:
+                    user_doc.update(mmr=event['mu_before'], confidence=event['sigma_before'],
+                                    games_played=user_doc.get('games_played', 1) - 1)
+
+        def rating_for(query_id):
+            user_doc = user_docs.get(query_id)
+            if not user_doc:
+                return env.create_rating(mu=1000, sigma=300)
+            return env.create_rating(mu=user_doc.get('mmr', 1000), sigma=user_doc.get('confidence', 300))
+
+        team_a_ratings = [rating_for(q) for q, (_, team) in zip(query_ids, players) if team == 'team_a']
+        team_b_ratings = [rating_for(q) for q, (_, team) in zip(query_ids, players) if team == 'team_b']
+
+        if result == "team_a":
+            team_a_result, team_b_result = env.rate([team_a_ratings, team_b_ratings], ranks=[0, 1])
+        else:
+            team_a_result, team_b_result = env.rate([team_a_ratings, team_b_ratings], ranks=[1, 0])
+
+        mmr_changes = []
+        operations = []
+        events = []
+        rated_at = datetime.datetime.now(datetime.timezone.utc)
+        for (player, team), query_id, new_rating in zip(players, query_ids, list(team_a_result) + list(team_b_result)):
+            user_doc = user_docs.get(query_id)
+            if not user_doc:
+                print(f"⚠️ User {player['discord_id']} not found in DB!")
+                continue
+            outcome = 'win' if result == team else 'lose'
+            if query_id in recorded:
+                change = change_from_event(recorded[query_id])
+            else:
+                change = compute_mmr_update(user_doc, new_rating.mu, new_rating.sigma, outcome)
+                if game_id is not None:
+                    events.append(ledger_event(query_id, game_id, rated_at, change, outcome))
+            if game_id is None:
+                operations.append(UpdateOne({'discord_id': query_id}, {'$set': change['set'], '$inc': change['inc']}))
+            else:
+                operations.append(UpdateOne(
+                    {'discord_id': query_id, 'last_game_id': {'$ne': game_id}},
+                    {'$set': {**change['set'], 'last_game_id': game_id}, '$inc': change['inc']}
+                ))
+            print(f"✅ Player {player['discord_id']}: ΔMMR = {change['delta']:.1f}, New MMR = {change['new_mmr']:.1f}, σ = {change['new_sigma']:.2f} (↓ {change['previous_sigma'] - change['new_sigma']:.2f})")
+            mmr_changes.append({
+                "discord_id": player['discord_id'],
+                "delta": change['delta'],
+                "new_mmr": change['new_mmr'],
+                "ign": player["ign"]
+            })
+
+        if events:
+            db.mmr_events.insert_many(events, ordered=False, session=session)
+        if operations:
+            db.users.bulk_write(operations, ordered=False, session=session)
+        if game_id is not None:
+            if in_transaction:
+                db.games.update_one({'_id': game_id}, {'$set': {'mmr_changes': mmr_changes}}, session=session)
+            else:
+                db.games.update_one(
+                    {'_id': game_id, 'mmr_applied': {'$ne': True}},
+                    {'$set': {'mmr_applied': True, 'mmr_result': result, 'mmr_changes': mmr_changes}},
+                    session=session
+                )
+        return mmr_changes
+
+    mmr_changes = run_in_transaction(apply)
+    profile_cache.invalidate(*[q for q in query_ids if q is not None])
+    if mmr_changes:
+        leaderboard.apply(({'discord_id': c['discord_id'], 'mmr': c['new_mmr'], 'ign': c['ign']} for c in mmr_changes), defer=True)
     return mmr_changes
 
 def process_match_result(game_id, result):
@@ -122,7 +229,13 @@ def process_match_result(game_id, result):
     team_a = game_doc.get('team_a', [])
     team_b = game_doc.get('team_b', [])
 
-    mmr_changes_raw = adjust_mmr_for_game(team_a, team_b, result)
+    if game_doc.get('mmr_applied'):
+        mmr_changes_raw = game_doc.get('mmr_changes', [])
+    else:
+        mmr_changes_raw = adjust_mmr_for_game(team_a, team_b, result, game_id=game_id)
+        if mmr_changes_raw is None:
+            stored = db.games.find_one({'_id': game_id}, {'mmr_changes': 1}) or {}
+            mmr_changes_raw = stored.get('mmr_changes', [])
     mmr_changes = []
 
     team_a_igns = {str(player.get('ign')).lower() for player in team_a}
@@ -0,0 +1,160 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timezone, timedelta
+from pymongo import ReturnDocument, ASCENDING
+from database import db
+from config import config
+
+
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+# A round can take as long as its slowest player check, so a lease must
+# outlast that even if a heartbeat is late.
+CHECK_TIMEOUT = config.get("monitor_check_timeout_seconds", 420)
+LEASE_SECONDS = max(config.get("monitor_lease_seconds", 600), CHECK_TIMEOUT + 60)
+DONE_RETENTION = timedelta(days=config.get("monitor_job_retention_days", 7))
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+def as_utc(value):
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def ensure_job_indexes():
+    db.monitor_jobs.create_index([("status", ASCENDING), ("next_run_at", ASCENDING)])
+    db.monitor_jobs.create_index("expire_at", expireAfterSeconds=0)
+
+
+def create_job(game_id, watchers, game_type, delay, max_wait):
+    now = utcnow()
+    next_run_at = now + timedelta(seconds=delay)
+    db.monitor_jobs.update_one(
+        {'_id': game_id},
+        {'$setOnInsert': {
+            'game_type': game_type,
+            'watchers': [list(w) for w in watchers],
+            'status': 'open',
+            'created_at': now,
+            'next_run_at': next_run_at,
+            'deadline_at': next_run_at + timedelta(seconds=max_wait),
+            'attempt': 0,
+            'votes': [],
+            'stats': {},
+            'wakes': 0,
+            'lease_owner': None,
+            'lease_expires_at': None,
+            'heartbeat_at': None,
+            'wake_requested': False,
+            'last_wake_at': None
+        }},
+        upsert=True
+    )
+
+
+def claim_due_job(exclude=()):
+    """
+    Atomically lease the most overdue open job whose lease is free or has
+    expired, so a job is only ever worked on by one bot process at a time.
+    Jobs in `exclude` (already running here) are never claimed again.
+    """
+    now = utcnow()
+    return db.monitor_jobs.find_one_and_update(
+        {
+            '_id': {'$nin': list(exclude)},
+            'status': 'open',
+            'next_run_at': {'$lte': now},
+            '$or': [{'lease_expires_at': None}, {'lease_expires_at': {'$lt': now}}]
+        },
+        {'$set': {
+            'lease_owner': WORKER_ID,
+            'lease_expires_at': now + timedelta(seconds=LEASE_SECONDS),
+            'heartbeat_at': now,
+            'wake_requested': False
+        }},
+        sort=[('next_run_at', ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def next_due_at():
+    doc = db.monitor_jobs.find_one({'status': 'open'}, {'next_run_at': 1}, sort=[('next_run_at', ASCENDING)])
+    return as_utc(doc['next_run_at']) if doc else None
+
+
+def heartbeat(game_id):
+    now = utcnow()
+    updated = db.monitor_jobs.update_one(
+        {'_id': game_id, 'lease_owner': WORKER_ID, 'status': 'open'},
+        {'$set': {'heartbeat_at': now, 'lease_expires_at': now + timedelta(seconds=LEASE_SECONDS)}}
+    )
+    return updated.matched_count > 0
+
+
+def checkpoint_job(game_id, next_run_at, attempt, votes, stats):
+    """
+    Save progress and release the lease. If a wake arrived while the round
+    was running the job is made due again right away.
+    """
+    before = db.monitor_jobs.find_one_and_update(
+        {'_id': game_id, 'lease_owner': WORKER_ID, 'status': 'open'},
+        {'$set': {
+            'next_run_at': next_run_at,
+            'attempt': attempt,
+            'votes': votes,
+            'stats': stats,
+            'lease_owner': None,
+            'lease_expires_at': None,
+            'wake_requested': False
+        }},
+        return_document=ReturnDocument.BEFORE
+    )
+    if before and before.get('wake_requested'):
+        db.monitor_jobs.update_one(
+            {'_id': game_id, 'status': 'open'},
+            {'$set': {'next_run_at': utcnow(), 'attempt': 0}}
+        )
+
+
+def finish_job(game_id, outcome, votes, stats):
+    now = utcnow()
+    db.monitor_jobs.update_one(
+        {'_id': game_id},
+        {'$set': {
+            'status': 'done',
+            'outcome': outcome,
+            'votes': votes,
+            'stats': stats,
+            'finished_at': now,
+            'expire_at': now + DONE_RETENTION,
+            'lease_owner': None,
+            'lease_expires_at': None
+        }}
+    )
+
+
+def wake_job(game_id, cooldown):
+    now = utcnow()
+    updated = db.monitor_jobs.update_one(
+        {
+            '_id': game_id,
+            'status': 'open',
+            '$or': [{'last_wake_at': None}, {'last_wake_at': {'$lt': now - timedelta(seconds=cooldown)}}]
+        },
+        {'$set': {'next_run_at': now, 'attempt': 0, 'wake_requested': True, 'last_wake_at': now}, '$inc': {'wakes': 1}}
+    )
+    if updated.modified_count:
+        return True
+    return db.monitor_jobs.count_documents({'_id': game_id, 'status': 'open'}, limit=1) > 0
+
+
+def cancel_job(game_id):
+    now = utcnow()
+    db.monitor_jobs.update_one(
+        {'_id': game_id, 'status': 'open'},
+        {'$set': {'status': 'done', 'outcome': 'canceled', 'finished_at': now, 'expire_at': now + DONE_RETENTION}}
+    )
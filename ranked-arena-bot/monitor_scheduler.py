@@ -0,0 +1,228 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from config import config
+from game_monitor_v2 import (
+    check_player_result, mark_timed_out, pending_game_type,
+    record_monitor_stats, settle_result, tally_votes
+)
+from monitor_jobs import (
+    CHECK_TIMEOUT, LEASE_SECONDS, as_utc, cancel_job, checkpoint_job, claim_due_job, create_job,
+    ensure_job_indexes, finish_job, heartbeat, next_due_at, utcnow, wake_job
+)
+from poll_policy import PollStats, default_limiter, default_policy
+
+
+class MonitorScheduler:
+    """
+    Runs match watches stored in the monitor_jobs collection. Due jobs are
+    leased one at a time, so several bot processes can share the work and
+    jobs orphaned by a restart are picked up again once their lease lapses.
+    The blocking scrapes run on a small shared worker pool; lease and job
+    bookkeeping has its own threads so a slow scrape never delays a heartbeat.
+    Every scrape gets a stop event that is set once its result is no longer
+    needed, so it hands its browser back instead of running to the end.
+    """
+
+    def __init__(self, max_workers=4, max_active=8, max_wait=1800, quorum=2,
+                 idle_poll=5, policy=default_policy, limiter=default_limiter):
+        self.max_active = max_active
+        self.max_wait = max_wait
+        self.quorum = quorum
+        self.idle_poll = idle_poll
+        self.policy = policy
+        self.limiter = limiter
+        self.wake_cooldown = config.get("poll_wake_cooldown", 30)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="monitor")
+        self._db_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="monitor-db")
+        self._active = {}
+        self._wakeup = None
+        self._runner = None
+        self._loop = None
+
+    async def _db(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._db_executor, fn, *args)
+
+    async def _scrape(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def start(self):
+        if self._runner and not self._runner.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._runner = asyncio.create_task(self._run())
+
+    def _notify(self):
+        if self._wakeup:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def watch(self, game_id, watchers, game_type):
+        if not watchers:
+            return
+        delay = self.policy.first_delay(game_type)
+        create_job(game_id, watchers, game_type, delay, self.max_wait)
+        self._notify()
+        print(f"[INFO] Scheduled monitor for {game_id} in {delay}s (watching {', '.join(ign for ign, _ in watchers)}).")
+
+    def wake(self, game_id):
+        """
+        Check a game now instead of waiting for its next poll, e.g. when a
+        player reports the match is over. Returns False if nothing to wake.
+        """
+        woken = wake_job(game_id, self.wake_cooldown)
+        if woken:
+            print(f"[INFO] Monitor for {game_id} woken early.")
+            self._notify()
+        return woken
+
+    def cancel(self, game_id):
+        cancel_job(game_id)
+        job = self._active.get(game_id)
+        if job:
+            self._stop_checks(job)
+        print(f"[INFO] Monitor for {game_id} canceled.")
+
+    def _stop_checks(self, job):
+        job["canceled"] = True
+        for stop in list(job["stops"]):
+            stop.set()
+
+    async def _run(self):
+        await self._db(ensure_job_indexes)
+        while True:
+            try:
+                while len(self._active) < self.max_active:
+                    doc = await self._db(claim_due_job, list(self._active))
+                    if not doc:
+                        break
+                    job = {"doc": doc, "canceled": False, "stops": set()}
+                    self._active[doc['_id']] = job
+                    asyncio.create_task(self._execute(job))
+
+                timeout = self.idle_poll
+                if len(self._active) < self.max_active:
+                    due = await self._db(next_due_at)
+                    if due:
+                        timeout = min(self.idle_poll, max(0.5, (due - utcnow()).total_seconds()))
+            except Exception as e:
+                print(f"[ERROR] Monitor dispatcher failed: {e}")
+                timeout = self.idle_poll
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _heartbeat(self, job):
+        while True:
+            await asyncio.sleep(LEASE_SECONDS / 3)
+            if not await self._db(heartbeat, job["doc"]['_id']):
+                print(f"[WARN] Lost lease on monitor {job['doc']['_id']}, stopping this round.")
+                self._stop_checks(job)
+                return
+
+    async def _check_player(self, job, stats, ign, team, game_type):
+        await self.limiter.acquire()
+        started = time.monotonic()
+        stop = threading.Event()
+        job["stops"].add(stop)
+        if job["canceled"]:
+            stop.set()
+        try:
+            return await asyncio.wait_for(
+                self._scrape(check_player_result, ign, team, job["doc"]['_id'], game_type, stop),
+                timeout=CHECK_TIMEOUT
+            )
+        finally:
+            # Settled, canceled or timed out: the scrape stops at its next checkpoint.
+            stop.set()
+            job["stops"].discard(stop)
+            stats.record_check(time.monotonic() - started)
+
+    async def _check_round(self, job, votes, stats):
+        game_id = job["doc"]['_id']
+        game_type = await self._db(pending_game_type, game_id)
+        if game_type is None:
+            return "done"
+
+        stats.rounds += 1
+        watchers = job["doc"].get('watchers', [])
+        quorum = min(self.quorum, len(watchers))
+        checks = [
+            asyncio.ensure_future(self._check_player(job, stats, ign, team, game_type))
+            for ign, team in watchers
+        ]
+        try:
+            for next_done in asyncio.as_completed(checks):
+                try:
+                    vote = await next_done
+                except Exception as e:
+                    print(f"[ERROR] Player check for {game_id} failed: {e}")
+                    continue
+                if job["canceled"]:
+                    return "retry"
+                if vote:
+                    votes[vote["ign"]] = vote
+                result = tally_votes(votes, quorum)
+                if result:
+                    await self._db(settle_result, game_id, result, votes)
+                    return result
+        finally:
+            for check in checks:
+                check.cancel()
+        return "retry"
+
+    async def _finish(self, doc, outcome, votes, stats):
+        created_at = as_utc(doc.get('created_at'))
+        watched = (utcnow() - created_at).total_seconds() if created_at else None
+        summary = stats.summary(outcome, wakes=doc.get('wakes', 0), watched_seconds=watched)
+        print(f"[INFO] Monitor for {doc['_id']} finished: {summary}")
+        await self._db(finish_job, doc['_id'], outcome, list(votes.values()), stats.to_doc())
+        await self._db(record_monitor_stats, doc['_id'], summary)
+
+    async def _execute(self, job):
+        doc = job["doc"]
+        game_id = doc['_id']
+        votes = {vote["ign"]: vote for vote in doc.get('votes', [])}
+        stats = PollStats(doc.get('stats'))
+        beat = asyncio.create_task(self._heartbeat(job))
+        try:
+            try:
+                status = await self._check_round(job, votes, stats)
+            except Exception as e:
+                print(f"[ERROR] Monitor check for {game_id} failed: {e}")
+                status = "retry"
+
+            if job["canceled"]:
+                return
+            if status != "retry":
+                await self._finish(doc, status, votes, stats)
+                return
+
+            now = utcnow()
+            deadline = as_utc(doc['deadline_at'])
+            if now >= deadline:
+                await self._db(mark_timed_out, game_id)
+                await self._finish(doc, "timed_out", votes, stats)
+                return
+            attempt = doc.get('attempt', 0)
+            next_run_at = min(deadline, now + timedelta(seconds=self.policy.next_delay(attempt)))
+            await self._db(checkpoint_job, game_id, next_run_at, attempt + 1, list(votes.values()), stats.to_doc())
+        except Exception as e:
+            print(f"[ERROR] Monitor job {game_id} could not be saved: {e}")
+        finally:
+            beat.cancel()
+            self._active.pop(game_id, None)
+            self._notify()
+
+
+scheduler = MonitorScheduler(
+    max_workers=config.get("monitor_workers", 4),
+    max_active=config.get("monitor_max_active_jobs", 8),
+    max_wait=config.get("monitor_max_wait", 1800),
+    quorum=config.get("result_quorum", 2)
+)
@@ -0,0 +1,106 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+from database import db
+from config import config
+from profile_cache import profile_cache
+from stats_fetch import search_player_id
+
+
+CACHE_TTL = timedelta(hours=config.get("player_id_cache_ttl_hours", 168))
+NEGATIVE_TTL = timedelta(minutes=config.get("player_id_cache_negative_ttl_minutes", 30))
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="id-resolver")
+_in_flight = set()
+_lock = threading.Lock()
+
+
+def ensure_cache_indexes():
+    db.player_id_cache.create_index("expires_at", expireAfterSeconds=0)
+
+
+def cache_key(ign):
+    return str(ign).strip().lower()
+
+
+def get_cached_user_id(ign):
+    """
+    Return the supervive user id for an IGN without touching the site.
+    On a miss a background resolution is queued and None is returned; an
+    IGN whose last search found nothing is not searched again until its
+    negative entry expires.
+    """
+    if not ign:
+        return None
+
+    user_doc = db.users.find_one({'ign': ign}, {'user_id': 1, 'user_id_ign': 1})
+    if user_doc and user_doc.get('user_id') and user_doc.get('user_id_ign', ign) == ign:
+        return user_doc['user_id']
+
+    cached = db.player_id_cache.find_one({'_id': cache_key(ign)})
+    if cached:
+        expires_at = cached.get('expires_at')
+        if expires_at and expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if not expires_at or expires_at > datetime.now(timezone.utc):
+            return cached.get('user_id')
+
+    resolve_in_background(ign)
+    return None
+
+
+def resolve_in_background(ign):
+    if not ign:
+        return
+    key = cache_key(ign)
+    with _lock:
+        if key in _in_flight:
+            return
+        _in_flight.add(key)
+    _executor.submit(_resolve, ign)
+
+
+def ensure_resolved(user_doc):
+    if not user_doc or not user_doc.get('ign'):
+        return
+    if not user_doc.get('user_id') or user_doc.get('user_id_ign', user_doc['ign']) != user_doc['ign']:
+        resolve_in_background(user_doc['ign'])
+
+
+def _resolve(ign):
+    key = cache_key(ign)
+    try:
+        user_id = search_player_id(ign)
+        now = datetime.now(timezone.utc)
+        if not user_id:
+            _remember_unresolved(key, ign, now)
+            return
+        db.player_id_cache.update_one(
+            {'_id': key},
+            {'$set': {'ign': ign, 'user_id': user_id, 'resolved_at': now, 'expires_at': now + CACHE_TTL}},
+            upsert=True
+        )
+        db.users.update_many({'ign': ign}, {'$set': {'user_id': user_id, 'user_id_ign': ign}})
+        profile_cache.invalidate_ign(ign)
+        print(f"✅ Resolved user_id {user_id} for {ign}")
+    except Exception as e:
+        print(f"[ERROR] Could not resolve user_id for {ign}: {e}")
+        _remember_unresolved(key, ign, datetime.now(timezone.utc))
+    finally:
+        with _lock:
+            _in_flight.discard(key)
+
+
+def _remember_unresolved(key, ign, now):
+    """
+    Negative entry: no search for this IGN until it expires. An id found
+    by an earlier search is kept and served meanwhile.
+    """
+    try:
+        db.player_id_cache.update_one(
+            {'_id': key},
+            {'$set': {'ign': ign, 'failed_at': now, 'expires_at': now + NEGATIVE_TTL}, '$setOnInsert': {'user_id': None}},
+            upsert=True
+        )
+    except Exception as e:
+        print(f"[WARN] Could not cache the failed lookup for {ign}: {e}")
@@ -0,0 +1,95 @@
+from database import db
+from schema import ACTIVE_RESULTS
+
+
+def load_active_players():
+    """Read who is queued and who is in an active game straight from Mongo."""
+    queued = {p['discord_id']: p.get('game_type') for p in db.in_queue.find({}, {'discord_id': 1, 'game_type': 1})}
+    in_game = {}
+    games = db.games.find({'result': {'$in': ACTIVE_RESULTS}}, {'team_a.discord_id': 1, 'team_b.discord_id': 1})
+    for game in games:
+        for player in game.get('team_a', []) + game.get('team_b', []):
+            in_game[player['discord_id']] = game['_id']
+    return queued, in_game
+
+
+class PlayerIndex:
+    """
+    In-memory view of which players are queued and which are in an active
+    game, kept up to date by the code paths that change either. Rebuilt
+    from Mongo on startup and periodically to pick up other processes.
+    """
+
+    def __init__(self):
+        self.queued = {}
+        self.in_game = {}
+        self.games = {}
+        self.ready = False
+        self._touched = []
+
+    def _touch(self, discord_ids):
+        discord_ids = list(discord_ids)
+        for touched in self._touched:
+            touched.update(discord_ids)
+
+    def queue_type(self, discord_id):
+        return self.queued.get(discord_id)
+
+    def is_queued(self, discord_id):
+        return discord_id in self.queued
+
+    def is_in_game(self, discord_id):
+        return discord_id in self.in_game
+
+    def add_queued(self, discord_id, game_type):
+        self._touch([discord_id])
+        self.queued[discord_id] = game_type
+
+    def remove_queued(self, discord_id):
+        self._touch([discord_id])
+        self.queued.pop(discord_id, None)
+
+    def start_game(self, game_id, discord_ids):
+        discord_ids = list(discord_ids)
+        self._touch(discord_ids)
+        for discord_id in discord_ids:
+            self.queued.pop(discord_id, None)
+            self.in_game[discord_id] = game_id
+        self.games[game_id] = set(discord_ids)
+
+    def end_game(self, game_id):
+        discord_ids = self.games.pop(game_id, set())
+        self._touch(discord_ids)
+        for discord_id in discord_ids:
+            if self.in_game.get(discord_id) == game_id:
+                del self.in_game[discord_id]
+
+    async def rebuild(self, run):
+        """
+        Reload from Mongo through `run` (an executor call). Players whose
+        state changed locally while the load was in flight keep that state.
+        Overlapping rebuilds each track their own changes.
+        """
+        touched = set()
+        self._touched.append(touched)
+        try:
+            queued, in_game = await run(load_active_players)
+        finally:
+            self._touched.remove(touched)
+
+        for discord_id in touched:
+            for fresh, current in ((queued, self.queued), (in_game, self.in_game)):
+                if discord_id in current:
+                    fresh[discord_id] = current[discord_id]
+                else:
+                    fresh.pop(discord_id, None)
+
+        games = {}
+        for discord_id, game_id in in_game.items():
+            games.setdefault(game_id, set()).add(discord_id)
+        self.queued, self.in_game, self.games = queued, in_game, games
+        self.ready = True
+        print(f"[INFO] Player index rebuilt: {len(queued)} queued, {len(in_game)} in {len(games)} active games.")
+
+
+index = PlayerIndex()
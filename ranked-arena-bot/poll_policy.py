@@ -0,0 +1,102 @@
+import asyncio
+import random
+import time
+from config import config
+
+
+class PollPolicy:
+    """
+    Decides when a monitored game is checked next: a per game type initial
+    delay, then exponential backoff with jitter between min and max interval.
+    """
+
+    def __init__(self, initial_delay, min_interval=20, max_interval=120, backoff=1.5, jitter=0.2, rng=None):
+        self.initial_delay = initial_delay
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+
+    def first_delay(self, game_type):
+        return self.initial_delay.get(game_type, self.initial_delay.get("ranked_arena", 300))
+
+    def next_delay(self, attempt):
+        delay = min(self.max_interval, self.min_interval * (self.backoff ** attempt))
+        spread = delay * self.jitter
+        return max(1.0, delay + self.rng.uniform(-spread, spread))
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every monitor so the combined request rate to the
+    stats site never exceeds `per_minute`, however many games are running.
+    """
+
+    def __init__(self, per_minute=30, burst=None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst or max(1, per_minute // 6)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = None
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class PollStats:
+    """
+    Per-game poll counters, kept as plain numbers so they can be stored on
+    the monitor job and resumed after a restart.
+    """
+
+    def __init__(self, saved=None):
+        saved = saved or {}
+        self.rounds = saved.get('rounds', 0)
+        self.checks = saved.get('checks', 0)
+        self.latency_total = saved.get('latency_total', 0.0)
+        self.latency_max = saved.get('latency_max', 0.0)
+
+    def record_check(self, seconds):
+        self.checks += 1
+        self.latency_total += seconds
+        self.latency_max = max(self.latency_max, seconds)
+
+    def to_doc(self):
+        return {
+            'rounds': self.rounds,
+            'checks': self.checks,
+            'latency_total': self.latency_total,
+            'latency_max': self.latency_max
+        }
+
+    def summary(self, outcome, wakes=0, watched_seconds=None):
+        return {
+            'outcome': outcome,
+            'rounds': self.rounds,
+            'checks': self.checks,
+            'wakes': wakes,
+            'avg_check_seconds': round(self.latency_total / self.checks, 3) if self.checks else None,
+            'max_check_seconds': round(self.latency_max, 3) if self.checks else None,
+            'watched_seconds': round(watched_seconds, 1) if watched_seconds is not None else None
+        }
+
+
+default_policy = PollPolicy(
+    initial_delay=config.get("monitor_initial_delay", {"ranked_arena": 300, "draft_arena": 480}),
+    min_interval=config.get("poll_min_interval", 20),
+    max_interval=config.get("poll_max_interval", 120),
+    backoff=config.get("poll_backoff", 1.5),
+    jitter=config.get("poll_jitter", 0.2)
+)
+default_limiter = RateLimiter(per_minute=config.get("poll_max_checks_per_minute", 30))
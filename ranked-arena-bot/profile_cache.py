@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+from config import config
+
+
+class ProfileCache:
+    """
+    Bounded LRU of users documents by discord_id, each kept for ttl seconds.
+    Writers invalidate after their write lands; a load that started before
+    an invalidation is not cached, so a reader never puts back a stale doc.
+    """
+
+    def __init__(self, max_size=2000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, discord_id):
+        """A copy of the cached profile, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(discord_id)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(discord_id)
+                self.hits += 1
+                return dict(entry[1])
+            if entry:
+                del self._entries[discord_id]
+            self.misses += 1
+            return None
+
+    def put(self, discord_id, doc, generation):
+        """Cache a doc loaded at `generation`; dropped if anything was invalidated since."""
+        if doc is None:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[discord_id] = (time.monotonic() + self.ttl, dict(doc))
+            self._entries.move_to_end(discord_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *discord_ids):
+        with self._lock:
+            self.generation += 1
+            for discord_id in discord_ids:
+                if self._entries.pop(discord_id, None):
+                    self.invalidations += 1
+
+    def invalidate_ign(self, ign):
+        with self._lock:
+            self.generation += 1
+            stale = [key for key, (_, doc) in self._entries.items() if doc.get('ign') == ign]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'invalidations': self.invalidations
+        }
+
+
+profile_cache = ProfileCache(
+    max_size=config.get("profile_cache_size", 2000),
+    ttl=config.get("profile_cache_ttl_seconds", 300)
+)
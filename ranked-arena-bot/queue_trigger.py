@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+from database import db
+from pymongo.errors import OperationFailure, PyMongoError
+from config import config
+
+
+class MatchmakingTrigger:
+    """
+    Runs matchmaking when players join the queue instead of on a timer.
+    Signals come from add_to_queue in this process and from an in_queue
+    change stream for other processes; a burst of them within `debounce`
+    seconds collapses into one run. Runs never overlap. Leaving the queue
+    never signals, since fewer players cannot form a new lobby.
+
+    `run` returns True while a queue is big enough for a lobby that its MMR
+    spread does not allow yet; the sweep only reruns matchmaking then, after
+    a signal that has not been served yet, or when players expired.
+    """
+
+    def __init__(self, debounce=0.25):
+        self.debounce = debounce
+        self.lock = asyncio.Lock()
+        self.runs = 0
+        self.signals = 0
+        self.dirty = True
+        self.waiting = False
+        self._loop = None
+        self._event = None
+        self._runner = None
+        self._watcher = None
+
+    def start(self, run):
+        if self._runner and not self._runner.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        self._runner = asyncio.create_task(self._run(run))
+        self._watcher = threading.Thread(target=self._watch_queue, name="queue-change-stream", daemon=True)
+        self._watcher.start()
+
+    def notify(self):
+        """Safe to call from any thread; before start() the change is only remembered."""
+        self.dirty = True
+        if not self._loop or self._loop.is_closed():
+            return
+        self.signals += 1
+        self._loop.call_soon_threadsafe(self._event.set)
+
+    async def run_now(self, run):
+        async with self.lock:
+            self.runs += 1
+            self.dirty = False
+            try:
+                self.waiting = bool(await run())
+            except Exception:
+                self.dirty = True
+                raise
+
+    def needs_sweep(self):
+        return self.dirty or self.waiting
+
+    async def _run(self, run):
+        while True:
+            await self._event.wait()
+            await asyncio.sleep(self.debounce)
+            self._event.clear()
+            try:
+                await self.run_now(run)
+            except Exception as e:
+                print(f"[ERROR] Triggered matchmaking failed: {e}")
+
+    def _watch_queue(self):
+        pipeline = [{'$match': {'operationType': {'$in': ['insert', 'replace', 'update']}}}]
+        while True:
+            try:
+                with db.in_queue.watch(pipeline) as stream:
+                    print("[INFO] Watching in_queue for matchmaking triggers.")
+                    for _ in stream:
+                        self.notify()
+            except OperationFailure as e:
+                print(f"[WARN] in_queue change stream unavailable ({e}); relying on local triggers and the sweep.")
+                return
+            except PyMongoError as e:
+                print(f"[WARN] in_queue change stream dropped: {e}")
+                time.sleep(5)
+
+
+trigger = MatchmakingTrigger(debounce=config.get("matchmaking_debounce_seconds", 0.25))
@@ -0,0 +1,301 @@
+import argparse
+import math
+import time
+from datetime import datetime, timezone
+import numpy as np
+from pymongo import ASCENDING
+from database import db
+from config import config
+from mmr_manager import MMR_RULES, TRUESKILL_PARAMS
+
+
+SHADOW_COLLECTION = config.get("replay_collection", "users_replay")
+BACKUP_COLLECTION = "users_pre_replay"
+
+_erfc = np.vectorize(math.erfc, otypes=[float])
+
+
+class ReplayGames:
+    """
+    Rated games as padded arrays of dense player indexes. Empty team slots
+    point at the extra row `len(player_ids)` and are masked out.
+    """
+
+    def __init__(self, player_ids, team_a, team_b, a_won, skipped=0):
+        self.player_ids = player_ids
+        self.team_a = team_a
+        self.team_b = team_b
+        self.a_won = a_won
+        self.skipped = skipped
+
+    def __len__(self):
+        return len(self.a_won)
+
+
+class ReplayState:
+    def __init__(self, size, params, rules):
+        self.mmr = np.full(size + 1, float(params["mu"]))
+        self.sigma = np.full(size + 1, float(rules["start_sigma"]))
+        self.games = np.zeros(size + 1, dtype=np.int64)
+        self.wins = np.zeros(size + 1, dtype=np.int64)
+        self.losses = np.zeros(size + 1, dtype=np.int64)
+        self.reset_trace()
+
+    def reset_trace(self):
+        self.win_prob = None
+        self.settled_delta_total = 0.0
+        self.settled_delta_count = 0
+
+    def ratings(self, index):
+        return {
+            'mmr': float(self.mmr[index]),
+            'confidence': float(self.sigma[index]),
+            'games_played': int(self.games[index]),
+            'wins': int(self.wins[index]),
+            'losses': int(self.losses[index])
+        }
+
+
+def _player_index(discord_id):
+    try:
+        return int(discord_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def load_games(games=None):
+    """
+    Stream every game that moved ratings, oldest first, into ReplayGames.
+    Games processed before mmr_applied was recorded have no stored winner
+    and are only counted in `skipped`.
+    """
+    games = games if games is not None else db.games
+    index = {}
+    rows_a, rows_b, a_won = [], [], []
+
+    cursor = games.find(
+        {'mmr_applied': True, 'mmr_result': {'$in': ['team_a', 'team_b']}},
+        {'team_a.discord_id': 1, 'team_b.discord_id': 1, 'mmr_result': 1},
+        sort=[('created_at', ASCENDING), ('_id', ASCENDING)],
+        batch_size=2000,
+        allow_disk_use=True
+    )
+    for game in cursor:
+        teams = []
+        for team in ('team_a', 'team_b'):
+            ids = [_player_index(p.get('discord_id')) for p in game.get(team, [])]
+            teams.append([index.setdefault(i, len(index)) for i in ids if i is not None])
+        if not teams[0] or not teams[1]:
+            continue
+        rows_a.append(teams[0])
+        rows_b.append(teams[1])
+        a_won.append(game['mmr_result'] == 'team_a')
+
+    skipped = games.count_documents({
+        'result': 'processed',
+        'mmr_applied': {'$ne': True},
+        'final_result': {'$nin': ['canceled', 'timed_out']}
+    })
+    player_ids = np.array(list(index), dtype=np.int64)
+    return ReplayGames(
+        player_ids,
+        _pad(rows_a, len(index)),
+        _pad(rows_b, len(index)),
+        np.array(a_won, dtype=bool),
+        skipped=skipped
+    )
+
+
+def _pad(rows, filler):
+    width = max((len(row) for row in rows), default=1)
+    padded = np.full((len(rows), width), filler, dtype=np.int64)
+    for i, row in enumerate(rows):
+        padded[i, :len(row)] = row
+    return padded
+
+
+def schedule_layers(games):
+    """
+    Give each game the first layer after every earlier game of its players.
+    Games in one layer share no player, so a layer is rated as one array step
+    and every player still sees their games in order.
+    """
+    dummy = len(games.player_ids)
+    last = np.full(dummy + 1, -1, dtype=np.int64)
+    layers = np.empty(len(games), dtype=np.int64)
+    for g, players in enumerate(np.hstack([games.team_a, games.team_b])):
+        players = players[players != dummy]
+        layer = last[players].max() + 1
+        layers[g] = layer
+        last[players] = layer
+    return layers
+
+
+def _v_w(t):
+    pdf = np.exp(-t * t / 2) / math.sqrt(2 * math.pi)
+    cdf = 0.5 * _erfc(-t / math.sqrt(2))
+    v = np.where(cdf > 0, pdf / np.where(cdf > 0, cdf, 1.0), -t)
+    return v, v * (v + t)
+
+
+def apply_rules(mmr, prev_sigma, games_played, won, new_mu, new_sigma, jitter, rules):
+    """Array form of mmr_manager.compute_mmr_update."""
+    manual_sigma = np.maximum(rules["min_sigma"], rules["start_sigma"] - games_played * rules["sigma_step"])
+    sigma = np.where(new_sigma < prev_sigma, np.maximum(manual_sigma, new_sigma), prev_sigma)
+
+    delta = (new_mu - mmr) * np.maximum(rules["decay_floor"], 1 - games_played * rules["decay_rate"])
+    floor = (rules["min_delta"] + jitter) * np.where(won, 1.0, -1.0)
+    delta = np.where(np.abs(delta) < rules["min_delta"], floor, delta)
+    delta = np.clip(delta, -rules["max_delta"], rules["max_delta"])
+    return delta, sigma
+
+
+def rate_layer(state, team_a, team_b, a_won, jitter, params, rules):
+    """
+    Closed-form two-team TrueSkill update (no draws) for a batch of games,
+    followed by the MMR rules, written straight into the state arrays.
+    Returns team A's pre-match win probability and each rated player's delta
+    with their games played before the match.
+    """
+    dummy = len(state.mmr) - 1
+    beta2 = params["beta"] ** 2
+    tau2 = params["tau"] ** 2
+    players = np.hstack([team_a, team_b])
+    mask = players != dummy
+    on_a = np.zeros(players.shape, dtype=bool)
+    on_a[:, :team_a.shape[1]] = True
+
+    mmr = state.mmr[players]
+    var = (state.sigma[players] ** 2 + tau2) * mask
+    side = np.where(on_a, 1.0, -1.0)
+
+    c2 = var.sum(axis=1) + mask.sum(axis=1) * beta2
+    c = np.sqrt(c2)
+    winner_side = np.where(a_won, 1.0, -1.0)
+    diff_a = (mmr * side * mask).sum(axis=1)
+    p_a = 0.5 * _erfc(-diff_a / (c * math.sqrt(2)))
+    t = winner_side * diff_a / c
+    v, w = _v_w(t)
+
+    won = (side * winner_side[:, None]) > 0
+    new_mu = mmr + np.where(won, 1.0, -1.0) * var / c[:, None] * v[:, None]
+    new_sigma = np.sqrt(var * (1 - var / c2[:, None] * w[:, None]))
+
+    delta, sigma = apply_rules(
+        mmr[mask], state.sigma[players][mask], state.games[players][mask], won[mask],
+        new_mu[mask], new_sigma[mask], jitter[mask], rules
+    )
+    rated = players[mask]
+    games_before = state.games[rated].copy()
+    state.mmr[rated] = mmr[mask] + delta
+    state.sigma[rated] = sigma
+    state.games[rated] += 1
+    state.wins[rated] += won[mask]
+    state.losses[rated] += ~won[mask]
+    return p_a, delta, games_before
+
+
+def replay(games, params=None, rules=None, seed=0, settled_after=20):
+    """
+    Recompute every player's rating from the game history. The jitter of the
+    minimum-delta rule is drawn up front from `seed`, so a replay with the
+    same inputs always gives the same ratings. The state also keeps each
+    game's pre-match win probability and the deltas of settled players.
+    """
+    params = params or TRUESKILL_PARAMS
+    rules = rules or MMR_RULES
+    state = ReplayState(len(games.player_ids), params, rules)
+    if not len(games):
+        return state
+
+    width = games.team_a.shape[1] + games.team_b.shape[1]
+    jitter = np.random.default_rng(seed).uniform(0, rules["min_delta_jitter"], size=(len(games), width))
+    layers = schedule_layers(games)
+    order = np.argsort(layers, kind="stable")
+    bounds = np.flatnonzero(np.diff(layers[order])) + 1
+    state.win_prob = np.empty(len(games))
+    for batch in np.split(order, bounds):
+        p_a, delta, games_before = rate_layer(
+            state, games.team_a[batch], games.team_b[batch], games.a_won[batch], jitter[batch], params, rules
+        )
+        state.win_prob[batch] = p_a
+        settled = games_before >= settled_after
+        state.settled_delta_total += float(np.abs(delta[settled]).sum())
+        state.settled_delta_count += int(settled.sum())
+    return state
+
+
+def write_shadow(games, state, collection_name=SHADOW_COLLECTION, batch_size=1000):
+    """
+    Copy users into the shadow collection with replayed rating fields and the
+    same indexes. Players without replayed games keep their current rating.
+    """
+    index = {int(discord_id): i for i, discord_id in enumerate(games.player_ids)}
+    replayed_at = datetime.now(timezone.utc)
+
+    shadow = db[collection_name]
+    shadow.drop()
+    batch = []
+    written = 0
+    for user in db.users.find({}):
+        i = index.get(_player_index(user.get('discord_id')))
+        if i is not None:
+            user.update(state.ratings(i))
+        user['replayed_at'] = replayed_at
+        batch.append(user)
+        if len(batch) >= batch_size:
+            shadow.insert_many(batch, ordered=False)
+            written += len(batch)
+            batch = []
+    if batch:
+        shadow.insert_many(batch, ordered=False)
+        written += len(batch)
+
+    for name, info in db.users.index_information().items():
+        if name == '_id_':
+            continue
+        keys = info.pop('key')
+        info.pop('v', None)
+        info.pop('ns', None)
+        shadow.create_index(keys, name=name, **info)
+    return written
+
+
+def swap_in(collection_name=SHADOW_COLLECTION):
+    """
+    Replace users with the shadow collection in a single renameCollection,
+    keeping the old one as users_pre_replay. Stop the bot first: user changes
+    made after the shadow copy was written would be lost.
+    """
+    db.users.aggregate([{'$out': BACKUP_COLLECTION}])
+    db[collection_name].rename('users', dropTarget=True)
+    print(f"✅ Swapped {collection_name} into users (previous users kept in {BACKUP_COLLECTION}).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute every player's MMR from stored games.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--collection", default=SHADOW_COLLECTION)
+    parser.add_argument("--swap", action="store_true", help="replace users with the replayed ratings")
+    parser.add_argument("--force", action="store_true", help="swap even if some processed games could not be replayed")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    history = load_games()
+    loaded = time.perf_counter()
+    result = replay(history, seed=args.seed)
+    rated = time.perf_counter()
+    written = write_shadow(history, result, args.collection)
+    finished = time.perf_counter()
+
+    print(f"[INFO] Replayed {len(history)} games for {len(history.player_ids)} players "
+          f"(load {loaded - started:.2f}s, rate {rated - loaded:.2f}s, write {finished - rated:.2f}s).")
+    if history.skipped:
+        print(f"[WARN] {history.skipped} processed games predate recorded winners and were not replayed.")
+    print(f"[INFO] Wrote {written} users to {args.collection}.")
+    if args.swap:
+        if history.skipped and not args.force:
+            print(f"[ERROR] Not swapping: players with skipped games would be rebuilt from the starting rating "
+                  f"using only their newer games. Check {args.collection}, then rerun with --swap --force.")
+        else:
+            swap_in(args.collection)
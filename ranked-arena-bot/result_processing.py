@@ -0,0 +1,80 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timezone, timedelta
+from pymongo import ReturnDocument, ASCENDING
+from database import db
+from config import config
+
+
+# Game result states:
+#   pending -> team_a | team_b | canceled | timed_out   (monitor, votes, drafts)
+#   team_a | team_b | canceled | timed_out -> processing (claimed by one worker)
+#   processing -> processed                              (final_result keeps the outcome)
+# A processing claim whose lease ran out is taken over by the next worker.
+SETTLED_RESULTS = ['team_a', 'team_b', 'canceled', 'timed_out']
+DRAFT_DONE_STAGES = ['complete', 'draft_complete']
+FINISHED_RESULTS = SETTLED_RESULTS + ['processing', 'processed']
+
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+LEASE_SECONDS = config.get("result_lease_seconds", 120)
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+def ensure_result_indexes():
+    db.games.create_index([("result", ASCENDING), ("processing_lease_expires_at", ASCENDING)])
+
+
+def claimable_query(now):
+    return {'$or': [
+        {'result': {'$in': ['team_a', 'team_b']}, 'game_type': {'$ne': 'draft_arena'}},
+        {'result': {'$in': ['team_a', 'team_b']}, 'current_draft_stage': {'$in': DRAFT_DONE_STAGES}},
+        {'result': {'$in': ['canceled', 'timed_out']}},
+        {'result': 'processing', 'processing_lease_expires_at': {'$lt': now}}
+    ]}
+
+
+def claim_next_game():
+    """
+    Atomically move one settled game into `processing` under this worker's
+    lease. The settled result is kept in reported_result so a claim taken
+    over after a crash still knows what to process.
+    """
+    now = utcnow()
+    return db.games.find_one_and_update(
+        claimable_query(now),
+        [{'$set': {
+            'reported_result': {'$cond': [{'$eq': ['$result', 'processing']}, '$reported_result', '$result']},
+            'result': 'processing',
+            'processing_owner': WORKER_ID,
+            'processing_lease_expires_at': now + timedelta(seconds=LEASE_SECONDS),
+            'processing_attempts': {'$add': [{'$ifNull': ['$processing_attempts', 0]}, 1]}
+        }}],
+        sort=[('_id', ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def mark_announced(game_id):
+    db.games.update_one({'_id': game_id, 'processing_owner': WORKER_ID}, {'$set': {'announced_result': True}})
+
+
+def mark_processed(game_id):
+    """
+    Finish a claim. Only the worker holding it can, so a lost lease never
+    overwrites the takeover's work.
+    """
+    updated = db.games.update_one(
+        {'_id': game_id, 'result': 'processing', 'processing_owner': WORKER_ID},
+        [
+            {'$set': {'result': 'processed', 'final_result': '$reported_result', 'processed_at': utcnow()}},
+            {'$unset': ['processing_owner', 'processing_lease_expires_at']}
+        ]
+    )
+    if not updated.modified_count:
+        print(f"[WARN] Lost processing claim on {game_id}, leaving it to the new owner.")
+        return False
+    return True
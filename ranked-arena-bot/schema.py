@@ -0,0 +1,118 @@
+from datetime import datetime, timezone
+from pymongo import ASCENDING, IndexModel, UpdateOne
+from pymongo.errors import OperationFailure, PyMongoError
+from database import db
+
+# Indexes behind the hot queries on users, in_queue and games. Ledger, cache,
+# monitor job and result-claim indexes live next to the code that owns them.
+ACTIVE_RESULTS = ['pending', 'team_a', 'team_b', 'processing']
+
+INDEXES = {
+    "users": [
+        IndexModel([("discord_id", ASCENDING)], name="discord_id_unique", unique=True),
+        IndexModel([("ign", ASCENDING)], name="ign"),
+    ],
+    "in_queue": [
+        IndexModel([("discord_id", ASCENDING)], name="discord_id_unique", unique=True),
+        IndexModel([("game_type", ASCENDING), ("queue_joined_at", ASCENDING)], name="game_type_joined_at"),
+        IndexModel([("queue_joined_at", ASCENDING)], name="joined_at"),
+    ],
+    "games": [
+        IndexModel([("result", ASCENDING)], name="result"),
+        IndexModel([("block_hash", ASCENDING)], name="block_hash"),
+        IndexModel([("draft_start_time", ASCENDING)], name="draft_start_time", sparse=True),
+    ],
+}
+
+
+def hot_queries():
+    """(label, collection, filter, sort) for every query that must not scan a collection."""
+    now = datetime.now(timezone.utc)
+    return [
+        ("user by discord_id", "users", {"discord_id": 0}, None),
+        ("user by ign", "users", {"ign": ""}, None),
+        ("queue entry by discord_id", "in_queue", {"discord_id": 0}, None),
+        ("queue by game type", "in_queue", {"game_type": "ranked_arena"}, [("queue_joined_at", ASCENDING)]),
+        ("expired queue entries", "in_queue", {"queue_joined_at": {"$lt": now}}, None),
+        ("games by result", "games", {"result": {"$in": ACTIVE_RESULTS}}, None),
+        ("game by block hash", "games", {"block_hash": ""}, None),
+        ("old draft threads", "games", {"draft_start_time": {"$lt": now}}, None),
+    ]
+
+
+def ensure_indexes():
+    for collection, indexes in INDEXES.items():
+        try:
+            db[collection].create_indexes(indexes)
+        except OperationFailure as e:
+            # Usually a unique index over existing duplicates; the rest still work.
+            print(f"[ERROR] Could not create indexes on {collection}: {e}")
+            for index in indexes:
+                try:
+                    db[collection].create_indexes([index])
+                except OperationFailure:
+                    print(f"[ERROR] Index {index.document['name']} on {collection} is missing.")
+
+
+def _parse_timestamp(value):
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            try:
+                value = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                return None
+    if not isinstance(value, datetime):
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def normalize_queue_timestamps():
+    """
+    One-time migration: rewrite in_queue rows whose queue_joined_at is not a
+    BSON date (ISO or "%Y-%m-%d %H:%M:%S" strings, or missing) as UTC dates.
+    Unreadable values become now. Does nothing once every row is a date.
+    """
+    now = datetime.now(timezone.utc)
+    operations = [
+        UpdateOne({'_id': entry['_id']}, {'$set': {'queue_joined_at': _parse_timestamp(entry.get('queue_joined_at')) or now}})
+        for entry in db.in_queue.find({'queue_joined_at': {'$not': {'$type': 'date'}}}, {'queue_joined_at': 1})
+    ]
+    if operations:
+        db.in_queue.bulk_write(operations, ordered=False)
+        print(f"[INFO] Normalized queue_joined_at on {len(operations)} queue entries.")
+    return len(operations)
+
+
+def _plan_stages(plan):
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage'], plan.get('indexName')
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _plan_stages(value)
+
+
+def check_query_plans():
+    """Explain each hot query and warn about any that would scan a collection. Returns the scans."""
+    scans = []
+    for label, collection, query, sort in hot_queries():
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            winning = cursor.explain().get('queryPlanner', {}).get('winningPlan', {})
+        except PyMongoError as e:
+            print(f"[WARN] Could not explain '{label}': {e}")
+            continue
+        stages = list(_plan_stages(winning))
+        indexes = sorted({name for stage, name in stages if name})
+        if any(stage == 'COLLSCAN' for stage, _ in stages):
+            scans.append(label)
+            print(f"[WARN] '{label}' on {collection} is a collection scan.")
+        else:
+            print(f"[INFO] '{label}' on {collection} uses {', '.join(indexes) or 'an index'}.")
+    return scans
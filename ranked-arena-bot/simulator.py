@@ -0,0 +1,182 @@
+import argparse
+import heapq
+import itertools
+import math
+import random
+import statistics
+import time
+from datetime import datetime, timezone, timedelta
+from matchmaking import SETTINGS, form_lobbies
+
+# Offline queue simulator: synthetic arrivals on a virtual clock, an in-memory
+# queue and the same form_lobbies call start_matchmaking makes. Example sweep:
+#   python simulator.py --workload poisson,peak --mmr normal,skewed --rate 2,6 --base-spread 200,400
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+class MemoryQueue:
+    """Stand-in for the in_queue collection."""
+
+    def __init__(self):
+        self.players = {}
+
+    def insert(self, player):
+        self.players[player['discord_id']] = player
+
+    def delete_many(self, discord_ids):
+        for discord_id in discord_ids:
+            self.players.pop(discord_id, None)
+
+    def find(self):
+        return list(self.players.values())
+
+
+def arrival_rate(workload, base_rate, minute):
+    """Players per minute at a point of the virtual day."""
+    if workload == "peak":
+        hour = (minute / 60) % 24
+        evening = math.exp(-((hour - 20) ** 2) / 4)
+        return base_rate * (0.3 + 2.7 * evening)
+    if workload == "bursts":
+        return base_rate * (4 if minute % 60 < 10 else 0.7)
+    return base_rate
+
+
+def sample_mmr(distribution, rng):
+    if distribution == "skewed":
+        return int(700 + rng.lognormvariate(5.5, 0.5))
+    if distribution == "bimodal":
+        return int(rng.gauss(800, 100) if rng.random() < 0.6 else rng.gauss(1400, 120))
+    return int(rng.gauss(1000, 200))
+
+
+def arrivals(workload, mmr_distribution, base_rate, minutes, rng):
+    """Non-homogeneous Poisson arrivals by thinning, as (second, player)."""
+    peak = max(arrival_rate(workload, base_rate, m) for m in range(int(minutes) + 1))
+    t = 0.0
+    player_id = 0
+    while True:
+        t += rng.expovariate(peak / 60)
+        if t >= minutes * 60:
+            return
+        if rng.random() * peak <= arrival_rate(workload, base_rate, t / 60):
+            player_id += 1
+            yield t, {
+                'discord_id': player_id,
+                'ign': f"Sim#{player_id}",
+                'mmr': sample_mmr(mmr_distribution, rng),
+                'game_type': "ranked_arena",
+                'queue_joined_at': EPOCH + timedelta(seconds=t)
+            }
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def simulate(workload="poisson", mmr_distribution="normal", rate=4.0, minutes=240, mode="event",
+             poll_seconds=20, debounce=0.25, sweep_seconds=30, timeout_minutes=60, settings=None, seed=0):
+    """
+    Run one configuration and return its wait, balance and throughput stats.
+    mode "event" matches after each join (debounced) plus a periodic sweep,
+    mode "poll" only on a fixed timer like the old check_queue.
+    """
+    settings = settings or SETTINGS
+    rng = random.Random(seed)
+    queue = MemoryQueue()
+    events = []
+    order = itertools.count()
+    for t, player in arrivals(workload, mmr_distribution, rate, minutes, rng):
+        heapq.heappush(events, (t, next(order), "join", player))
+    tick = sweep_seconds if mode == "event" else poll_seconds
+    heapq.heappush(events, (tick, next(order), "sweep", None))
+
+    waits, diffs, spreads = [], [], []
+    lobbies = 0
+    kicked = 0
+    run_pending = False
+    end = minutes * 60
+
+    while events:
+        t, _, kind, player = heapq.heappop(events)
+        if t > end:
+            break
+        now = EPOCH + timedelta(seconds=t)
+
+        if kind == "join":
+            queue.insert(player)
+            if mode == "event" and not run_pending:
+                run_pending = True
+                heapq.heappush(events, (t + debounce, next(order), "run", None))
+            continue
+
+        if kind == "sweep":
+            expired = [p['discord_id'] for p in queue.find()
+                       if (now - p['queue_joined_at']).total_seconds() > timeout_minutes * 60]
+            kicked += len(expired)
+            queue.delete_many(expired)
+            heapq.heappush(events, (t + tick, next(order), "sweep", None))
+        else:
+            run_pending = False
+
+        for lobby in form_lobbies(queue.find(), now, settings):
+            lobbies += 1
+            diffs.append(lobby.smallest_diff)
+            spreads.append(lobby.spread)
+            waits.extend((now - p['queue_joined_at']).total_seconds() for p in lobby.players)
+            queue.delete_many([p['discord_id'] for p in lobby.players])
+
+    return {
+        'matched': len(waits),
+        'kicked': kicked,
+        'left_in_queue': len(queue.players),
+        'wait_p50': percentile(waits, 0.50),
+        'wait_p95': percentile(waits, 0.95),
+        'wait_p99': percentile(waits, 0.99),
+        'diff_mean': statistics.mean(diffs) if diffs else float("nan"),
+        'diff_p95': percentile(diffs, 0.95),
+        'spread_mean': statistics.mean(spreads) if spreads else float("nan"),
+        'lobbies_per_minute': lobbies / minutes
+    }
+
+
+def _values(text, cast=str):
+    return [cast(v) for v in text.split(",")] if text else [None]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate matchmaking wait times on synthetic queues.")
+    parser.add_argument("--workload", default="poisson", help="poisson, peak, bursts")
+    parser.add_argument("--mmr", default="normal", help="normal, skewed, bimodal")
+    parser.add_argument("--rate", default="4", help="base arrivals per minute")
+    parser.add_argument("--mode", default="event", help="event, poll")
+    parser.add_argument("--team-size", default=None)
+    parser.add_argument("--base-spread", default=None)
+    parser.add_argument("--max-wait", default=None, help="max_wait_seconds")
+    parser.add_argument("--minutes", type=float, default=240)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'workload':<8} {'mmr':<8} {'rate':>5} {'mode':<6} {'team':>4} {'spread':>6} {'maxw':>5} "
+          f"{'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'diff':>6} {'diff95':>7} {'lob/min':>8} {'kicked':>6}")
+    for workload, mmr, rate, mode, team_size, base_spread, max_wait in itertools.product(
+            _values(args.workload), _values(args.mmr), _values(args.rate, float), _values(args.mode),
+            _values(args.team_size, int), _values(args.base_spread, float), _values(args.max_wait, float)):
+        settings = dict(SETTINGS)
+        if team_size:
+            settings["team_size"] = team_size
+        if base_spread is not None:
+            settings["base_spread"] = base_spread
+        if max_wait is not None:
+            settings["max_wait_seconds"] = max_wait
+
+        started = time.perf_counter()
+        stats = simulate(workload, mmr, rate, args.minutes, mode, settings=settings, seed=args.seed)
+        print(f"{workload:<8} {mmr:<8} {rate:>5g} {mode:<6} {settings['team_size']:>4} {settings['base_spread']:>6g} "
+              f"{settings['max_wait_seconds']:>5g} {stats['wait_p50']:>7.1f} {stats['wait_p95']:>7.1f} "
+              f"{stats['wait_p99']:>7.1f} {stats['diff_mean']:>6.1f} {stats['diff_p95']:>7.1f} "
+              f"{stats['lobbies_per_minute']:>8.2f} {stats['kicked']:>6} ({time.perf_counter() - started:.2f}s)")
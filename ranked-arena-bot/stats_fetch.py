@@ -0,0 +1,204 @@
+import time
+import urllib3
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from browser_pool import shared_pool
+from config import config
+from match_parser import extract_match_cards, is_app_shell
+
+STATS_BASE_URL = config.get("stats_base_url", "https://supervive-stats.com").rstrip("/")
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+
+
+def stopped(stop, seconds=0):
+    """Wait up to `seconds`; True as soon as the optional stop event is set."""
+    if stop is None:
+        if seconds:
+            time.sleep(seconds)
+        return False
+    return stop.wait(seconds) if seconds else stop.is_set()
+
+
+def player_url(user_id):
+    return f"{STATS_BASE_URL}/players/{user_id}"
+
+
+def robust_get(driver, url, max_retries=3, wait_seconds=5):
+    for attempt in range(max_retries):
+        try:
+            driver.get(url)
+            return True
+        except TimeoutException:
+            print(f"[WARN] Timeout on attempt {attempt+1}/{max_retries} for {url}")
+            try:
+                driver.save_screenshot(f"selenium_timeout_attempt_{attempt+1}.png")
+            except Exception:
+                pass
+            if attempt < max_retries - 1:
+                time.sleep(wait_seconds)
+            else:
+                raise
+    return False
+
+
+def accept_consent_popup(driver):
+    try:
+        consent_button = WebDriverWait(driver, 2).until(
+            EC.presence_of_element_located((By.XPATH, "//p[contains(@class, 'fc-button-label') and text()='Consent']"))
+        )
+        if consent_button.is_displayed():
+            try:
+                parent_btn = consent_button.find_element(By.XPATH, "./ancestor::button | ./ancestor::div[@role='button']")
+                parent_btn.click()
+                print("[INFO] Consent pop-up found and clicked.")
+                time.sleep(1)
+            except Exception as click_e:
+                print(f"[WARN] Consent pop-up found but could not be clicked: {click_e}")
+        else:
+            print("[INFO] Consent pop-up present but not visible, skipping.")
+    except TimeoutException:
+        print("[INFO] Consent pop-up not found, continuing...")
+    except NoSuchElementException:
+        print("[INFO] Consent pop-up not found, continuing...")
+    except Exception as e:
+        print(f"[ERROR] Unexpected error in consent pop-up handling: {e}")
+
+
+def search_player_id(ign):
+    """
+    Look an IGN up through the site's search box and return the supervive
+    user id from the first result, or None. Slow; call it off the hot path.
+    """
+    if not ign:
+        print("❌ IGN is empty or undefined. Aborting input.")
+        return None
+
+    with shared_pool.lease() as driver:
+        driver.get(STATS_BASE_URL)
+        time.sleep(2)
+        accept_consent_popup(driver)
+        time.sleep(1)
+
+        input_box = WebDriverWait(driver, 30).until(
+            EC.visibility_of_element_located((By.XPATH, "//input[@placeholder='Player#0000']"))
+        )
+        driver.execute_script("arguments[0].scrollIntoView();", input_box)
+        time.sleep(0.5)
+        input_box.clear()
+        input_box.send_keys(ign)
+
+        time.sleep(5)
+
+        dropdown_options = driver.find_elements(
+            By.CSS_SELECTOR,
+            "li.flex.cursor-pointer.items-center")
+        if not dropdown_options:
+            print(f"⚠️ No search results found for {ign}.")
+            return None
+
+        dropdown_options[0].click()
+        time.sleep(2)
+
+        current_url = driver.current_url
+
+    if "/players/" not in current_url:
+        print(f"⚠️ Search for {ign} did not open a player page: {current_url}")
+        return None
+    return current_url.split("/players/")[-1].split("?")[0]
+
+
+class HttpBackend:
+    """
+    Plain HTTP GET of the player page. Only useful while the site renders
+    its pages on the server: once a page comes back as the client-side app
+    shell the backend is skipped for `shell_retry` seconds, so checks go
+    straight to the browser instead of paying for both.
+    """
+    name = "http"
+
+    def __init__(self, max_connections=4, timeout=10, shell_retry=3600):
+        self.shell_retry = shell_retry
+        self.skip_until = 0
+        self.http = urllib3.PoolManager(
+            num_pools=2,
+            maxsize=max_connections,
+            block=False,
+            timeout=urllib3.Timeout(connect=5, read=timeout),
+            retries=urllib3.Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504]),
+            headers={"User-Agent": USER_AGENT, "Accept": "text/html"}
+        )
+
+    def fetch_player_html(self, user_id, stop=None):
+        response = self.http.request("GET", player_url(user_id))
+        if response.status != 200:
+            print(f"[WARN] HTTP backend got status {response.status} for {user_id}")
+            return None
+        return response.data.decode("utf-8", errors="replace")
+
+    def available(self):
+        return time.monotonic() >= self.skip_until
+
+    def no_cards(self, html):
+        if is_app_shell(html):
+            self.skip_until = time.monotonic() + self.shell_retry
+            print(f"[WARN] {STATS_BASE_URL} served a client-rendered page; skipping the HTTP backend for {self.shell_retry}s.")
+
+
+class SeleniumBackend:
+    name = "selenium"
+
+    def available(self):
+        return True
+
+    def no_cards(self, html):
+        pass
+
+    def fetch_player_html(self, user_id, stop=None):
+        with shared_pool.lease() as driver:
+            robust_get(driver, player_url(user_id), max_retries=3, wait_seconds=15)
+            if stopped(stop, 2):
+                return None
+            accept_consent_popup(driver)
+            if stopped(stop, 2):
+                return None
+            return driver.page_source
+
+
+BACKENDS = {
+    "http": lambda: HttpBackend(shell_retry=config.get("stats_http_shell_retry_minutes", 60) * 60),
+    "selenium": SeleniumBackend
+}
+
+_backends = [BACKENDS[name]() for name in config.get("stats_fetch_backends", ["http", "selenium"])]
+
+
+def fetch_match_cards(user_id, stop=None):
+    """
+    Fetch a player's match history using the configured backends in order
+    and return the parsed cards from the first backend that yields any.
+    Returns [] without fetching further once `stop` is set.
+    """
+    for backend in _backends:
+        if stopped(stop):
+            print(f"[DEBUG] Fetch for {user_id} stopped, result no longer needed.")
+            return []
+        if not backend.available():
+            continue
+        started = time.perf_counter()
+        try:
+            html = backend.fetch_player_html(user_id, stop)
+        except Exception as e:
+            print(f"[WARN] {backend.name} backend failed for {user_id}: {e}")
+            continue
+        if not html:
+            continue
+        cards = extract_match_cards(html)
+        elapsed = time.perf_counter() - started
+        if cards:
+            print(f"[DEBUG] {backend.name} backend returned {len(cards)} cards for {user_id} in {elapsed:.2f}s")
+            return cards
+        backend.no_cards(html)
+        print(f"[DEBUG] {backend.name} backend found no match cards for {user_id}, trying next backend.")
+    return []
@@ -0,0 +1,92 @@
+import os
+import threading
+import unittest
+import stats_fetch
+from fixture_server import FIXTURE_DIR, serve
+from stats_fetch import HttpBackend, fetch_match_cards
+
+# Runs fetch_match_cards against fixture_server.py over real HTTP:
+#   python -m unittest test_stats_fetch
+
+
+class FixtureBrowser:
+    """Stands in for the Selenium backend: serves the rendered fixture page and counts calls."""
+    name = "selenium"
+
+    def __init__(self, page="fixture-custom-win"):
+        self.page = page
+        self.calls = 0
+
+    def fetch_player_html(self, user_id, stop=None):
+        self.calls += 1
+        with open(os.path.join(FIXTURE_DIR, f"{self.page}.html"), encoding="utf-8") as f:
+            return f.read()
+
+    def available(self):
+        return True
+
+    def no_cards(self, html):
+        pass
+
+
+class CountingHttpBackend(HttpBackend):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+
+    def fetch_player_html(self, user_id, stop=None):
+        self.calls += 1
+        return super().fetch_player_html(user_id, stop)
+
+
+class FetchMatchCardsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = serve(port=0)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.saved = stats_fetch.STATS_BASE_URL, stats_fetch._backends
+        stats_fetch.STATS_BASE_URL = self.base_url
+        self.http = CountingHttpBackend(timeout=5)
+        self.browser = FixtureBrowser()
+        stats_fetch._backends = [self.http, self.browser]
+
+    def tearDown(self):
+        stats_fetch.STATS_BASE_URL, stats_fetch._backends = self.saved
+
+    def test_server_rendered_page_is_read_over_http(self):
+        cards = fetch_match_cards("fixture-custom-win")
+        self.assertEqual([card.placement for card in cards], [1, 2, 5])
+        self.assertTrue(cards[0].is_custom)
+        self.assertEqual(self.browser.calls, 0)
+
+    def test_app_shell_falls_back_and_skips_http_afterwards(self):
+        self.assertEqual(len(fetch_match_cards("fixture-app-shell")), 3)
+        self.assertEqual(self.browser.calls, 1)
+        self.assertFalse(self.http.available())
+
+        self.assertEqual(len(fetch_match_cards("fixture-not-custom")), 3)
+        self.assertEqual(self.http.calls, 1)
+        self.assertEqual(self.browser.calls, 2)
+
+    def test_missing_page_falls_back(self):
+        self.assertEqual(len(fetch_match_cards("no-such-player")), 3)
+        self.assertEqual(self.browser.calls, 1)
+        self.assertTrue(self.http.available())
+
+    def test_stopped_fetch_reads_nothing(self):
+        stop = threading.Event()
+        stop.set()
+        self.assertEqual(fetch_match_cards("fixture-custom-win", stop), [])
+        self.assertEqual(self.browser.calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()